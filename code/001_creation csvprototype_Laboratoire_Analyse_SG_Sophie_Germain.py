@@ -3,6 +3,11 @@ from tkinter import ttk, messagebox, filedialog
 import csv
 import os
 
+from crible_sg import liste_sg
+from index_sg import ENTIERS_PAR_TRANCHE, IndexSG
+from motifs import compter_motifs
+from pipeline_g3 import classifier_delta, get_famille, produire_g3
+
 # =============================================================================
 # 1. COUCHE SCIENTIFIQUE SG (BACKEND)
 # =============================================================================
@@ -18,36 +23,19 @@ def est_sg(p):
     return est_premier(p) and est_premier(2 * p + 1)
 
 def generate_sg(limit_n):
-    return [p for p in range(11, limit_n + 1) if est_sg(p)]
-
-def get_famille(p):
-    r = p % 30
-    if r == 29: return "348"
-    if r == 23: return "276"
-    if r == 11: return "132"
-    return "?"
+    # Index persistant si déjà calculé (ou si l'intervalle justifie de le
+    # construire), sinon crible segmenté conjoint p / 2p+1 (voir crible_sg.py)
+    index = IndexSG()
+    if limit_n >= ENTIERS_PAR_TRANCHE or index.couvre(11, limit_n):
+        return index.sg_in_range(11, limit_n)
+    return liste_sg(11, limit_n)
 
 # =============================================================================
 # 2. COUCHE GRAMMAIRE G1 / G2 / G3
 # =============================================================================
 
-def classifier_delta(delta):
-    """
-    G1: Alphabet fondamental {6,12,18,24}
-    G2: Briques stables {6,12}
-    G3: Anomalies (hors G1)
-    """
-    g1 = 1 if delta in [6, 12, 18, 24] else 0
-    g2 = 1 if delta in [6, 12] else 0
-    g3 = 1 if delta not in [6, 12, 18, 24] else 0
-    return g1, g2, g3
-
 def detecter_motifs_g2(deltas, taille=2):
-    freq = {}
-    for i in range(len(deltas) - taille + 1):
-        motif = tuple(deltas[i:i+taille])
-        freq[motif] = freq.get(motif, 0) + 1
-    return freq
+    return compter_motifs(deltas, taille).comptes(taille)
 
 # =============================================================================
 # 4. INTERFACE GUI (TKINTER)
@@ -93,6 +81,7 @@ class SGApp:
         frame3.pack(side="left", fill="both", expand=True, padx=(10, 0))
         
         ttk.Button(frame3, text="Exporter vers CSV", command=self.action_export).pack(fill="x", pady=2)
+        ttk.Button(frame3, text="Export direct en flux (grand N)", command=self.action_export_flux).pack(fill="x", pady=2)
         ttk.Button(frame3, text="Effacer Console", command=self.clear_console).pack(fill="x", pady=2)
 
         # --- BLOC 5 : CONSOLE ---
@@ -168,13 +157,10 @@ class SGApp:
             return
         
         deltas = [d['delta'] for d in self.tableau_data]
-        motifs = detecter_motifs_g2(deltas, 2)
-        
-        # Tri par fréquence
-        sorted_motifs = sorted(motifs.items(), key=lambda x: x[1], reverse=True)
+        moteur = compter_motifs(deltas, 2)
         
         self.log("--- Analyse des motifs G2 (Taille 2) ---")
-        for m, f in sorted_motifs[:10]: # Top 10
+        for m, f in moteur.top(2, 10): # Top 10, tri par fréquence
             self.log(f"Motif {m} : {f} occurrences")
 
     def action_export(self):
@@ -182,19 +168,65 @@ class SGApp:
             messagebox.showwarning("Attention", "Aucune donnée à exporter. Calculez d'abord.")
             return
         
-        filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("Colonnaire NumPy", "*.npz")])
         if filepath:
             keys = self.tableau_data[0].keys()
             try:
-                with open(filepath, 'w', newline='') as f:
-                    dict_writer = csv.DictWriter(f, fieldnames=keys)
-                    dict_writer.writeheader()
-                    dict_writer.writerows(self.tableau_data)
+                if filepath.endswith(".npz"):
+                    from format_g3 import ecrire_g3_npz
+                    ecrire_g3_npz(filepath, (tuple(d.values()) for d in self.tableau_data))
+                else:
+                    with open(filepath, 'w', newline='') as f:
+                        dict_writer = csv.DictWriter(f, fieldnames=keys)
+                        dict_writer.writeheader()
+                        dict_writer.writerows(self.tableau_data)
                 self.log(f"Exportation réussie : {os.path.basename(filepath)}")
                 messagebox.showinfo("Succès", f"Fichier sauvegardé :\n{filepath}")
             except Exception as e:
                 messagebox.showerror("Erreur", f"Échec de l'export : {str(e)}")
 
+    def action_export_flux(self):
+        """Génère et écrit la table G3 jusqu'à N sans la garder en mémoire."""
+        try:
+            n = int(self.ent_n.get())
+        except ValueError:
+            messagebox.showerror("Erreur", "Veuillez entrer un nombre entier valide.")
+            return
+
+        filepath = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("Colonnaire NumPy", "*.npz")])
+        if not filepath:
+            return
+
+        anomalies_affichees = [0]
+
+        def anomalie(ligne):
+            # La console n'affiche que les 50 premières anomalies
+            if anomalies_affichees[0] < 50:
+                i, p, fam_p, q, fam_q, delta = ligne[:6]
+                self.log(f"[ANOMALIE G3] n={i}: {p}({fam_p}) -> {q}({fam_q}) Δ={delta}")
+                anomalies_affichees[0] += 1
+
+        def progression(lignes, dernier_q):
+            self.lbl_count.config(text=f"Lignes écrites : {lignes} (q = {dernier_q})")
+            self.root.update()
+
+        try:
+            s = produire_g3(n, filepath, on_anomalie=anomalie, progression=progression)
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Échec de l'export : {str(e)}")
+            return
+
+        self.log("--- Synthèse de la classification (flux) ---")
+        self.log(f"Lignes            : {s['lignes']}")
+        self.log(f"G1 (Fondamentaux) : {s['G1']}")
+        self.log(f"G2 (Stables 6/12) : {s['G2']}")
+        self.log(f"G3 (Anomalies)    : {s['G3']}")
+        self.log(f"Exportation réussie : {os.path.basename(filepath)}")
+
 # =============================================================================
 # LANCEMENT
 # =============================================================================
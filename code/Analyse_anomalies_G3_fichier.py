@@ -1,12 +1,39 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-from collections import Counter
 import os
+from collections import Counter
+
+from chargeur_g3 import charger_g3
+from motifs import MoteurMotifs
+from stats_g3 import MomentsDelta, codes_transitions, decoder_transition, par_apparition
+
+# Lecture par blocs : mémoire bornée quelle que soit la taille du fichier
+TAILLE_BLOC = 1_000_000
+COLONNES = ["fam_p", "fam_q", "delta"]
+# Clés de motifs L3 sur 63 bits : Δ < 2^21
+BITS_MOTIFS = 21
+
+
+def _blocs(chemin_fichier, taille_bloc=TAILLE_BLOC):
+    """DataFrames successifs (fam_p, fam_q, delta) du fichier, par blocs de taille_bloc lignes."""
+    if chemin_fichier.endswith(".npz"):
+        # Format colonnaire : déjà compact (7 octets par ligne), découpé après lecture
+        df = charger_g3(chemin_fichier, usecols=COLONNES)
+        for i in range(0, len(df), taille_bloc):
+            yield df.iloc[i:i + taille_bloc]
+        return
+    yield from charger_g3(chemin_fichier, usecols=COLONNES, chunksize=taille_bloc)
+
+
+def _compter(compteur, valeurs):
+    """Ajoute les comptes du bloc ; l'ordre d'insertion reste celui de première apparition."""
+    for v, c in par_apparition(valeurs):
+        compteur[v] += c
+
 
 def analyser_G3(chemin_fichier):
     """
     Analyse approfondie des anomalies G3 à partir d'un fichier CSV structuré.
     Colonnes attendues : n, p, fam_p, q, fam_q, delta, G1, G2, G3
+    Accepte aussi le format colonnaire .npz (voir format_g3.py).
     """
     
     if not os.path.exists(chemin_fichier):
@@ -14,33 +41,36 @@ def analyser_G3(chemin_fichier):
         print("Assurez-vous que le fichier est dans le même dossier que ce script.")
         return
 
-    # --- 1. LECTURE DES DONNÉES AVEC PANDAS ---
+    # --- 1. LECTURE PAR BLOCS ET CALCULS STATISTIQUES (voir stats_g3.py) ---
+    # Chaque bloc est résumé puis libéré : comptes, moments et motifs se
+    # cumulent ; le moteur de motifs garde les 2 derniers Δ d'un bloc pour
+    # les fenêtres à cheval sur le suivant
+    c_familles, c_transitions, c_deltas = Counter(), Counter(), Counter()
+    moteur = MoteurMotifs(3, bits=BITS_MOTIFS)
+    resume = MomentsDelta()
     try:
-        # Détection automatique du séparateur (virgule, tabulation ou espace)
-        df = pd.read_csv(chemin_fichier, sep=None, engine='python')
-        
-        # Nettoyage des noms de colonnes
-        df.columns = [c.strip() for c in df.columns]
-        
+        for bloc in _blocs(chemin_fichier):
+            deltas = bloc['delta'].to_numpy()
+            fam_departs = bloc['fam_p'].to_numpy()
+            _compter(c_familles, fam_departs)
+            # Transitions codées fam_p*3 + fam_q (ex: 276->348)
+            _compter(c_transitions, codes_transitions(fam_departs, bloc['fam_q'].to_numpy()))
+            _compter(c_deltas, deltas)
+            # Motifs de taille 1 à 3 sur les deltas, en un seul passage (voir motifs.py)
+            moteur.ajouter(deltas)
+            # Résumé des Δ (moments, histogramme exact) : les graphiques en sont tirés
+            resume.ajouter(deltas)
     except Exception as e:
         print(f"Erreur lors de la lecture du fichier : {e}")
         return
 
-    total = len(df)
+    total = resume.n
     if total == 0:
         print("Erreur : Le fichier est vide.")
         return
 
-    # --- 2. CALCULS STATISTIQUES ---
-    deltas = df['delta'].tolist()
-    fam_departs = df['fam_p'].tolist()
-    
-    # Création des transitions (ex: 276->348)
-    transitions = [f"{row['fam_p']}->{row['fam_q']}" for _, row in df.iterrows()]
-    
-    # Motifs de taille 2 et 3 sur les deltas
-    motifs2 = [(deltas[i], deltas[i+1]) for i in range(len(deltas)-1)]
-    motifs3 = [(deltas[i], deltas[i+1], deltas[i+2]) for i in range(len(deltas)-2)]
+    motifs2 = moteur.top(2, 5)
+    motifs3 = moteur.top(3, 5)
 
     # --- 3. AFFICHAGE DU RÉSUMÉ DÉTAILLÉ ---
     print("="*60)
@@ -48,32 +78,36 @@ def analyser_G3(chemin_fichier):
     print("="*60)
     
     print(f"\n[1] RÉPARTITION DES FAMILLES (MOD 30)")
-    c_dep = Counter(fam_departs).most_common()
+    c_dep = c_familles.most_common()
     for fam, count in c_dep:
         print(f"  Position {fam:3} : {count:4} occurrences ({ (count/total)*100:5.1f}%)")
 
     print(f"\n[2] TOP 10 DES TRANSITIONS")
     # Analyse de la circulation entre les colonnes
-    for trans, count in Counter(transitions).most_common(10):
+    for code, count in c_transitions.most_common(10):
+        trans = "{}->{}".format(*decoder_transition(code))
         print(f"  {trans:9} : {count:4} fois ({ (count/total)*100:5.1f}%)")
 
     print(f"\n[3] ANALYSE DES DELTAS (Δ)")
-    moyenne = sum(deltas)/len(deltas)
-    print(f"  Δ Min : {min(deltas)} | Δ Max : {max(deltas)} | Δ Moyen : {moyenne:.2f}")
-    top_deltas = Counter(deltas).most_common(10)
+    moyenne = resume.moyenne
+    print(f"  Δ Min : {resume.min} | Δ Max : {resume.max} | Δ Moyen : {moyenne:.2f}")
+    top_deltas = c_deltas.most_common(10)
     for d, c in top_deltas:
         print(f"  Δ {d:4} : {c:4} fois")
 
     print(f"\n[4] ANALYSE DES MOTIFS SÉQUENTIELS (Cycles de Deltas)")
-    print(f"  Top 5 Séquences de 2 Δ : {Counter(motifs2).most_common(5)}")
-    print(f"  Top 5 Séquences de 3 Δ : {Counter(motifs3).most_common(5)}")
+    print(f"  Top 5 Séquences de 2 Δ : {motifs2}")
+    print(f"  Top 5 Séquences de 3 Δ : {motifs3}")
     
     # --- 4. GÉNÉRATION DES GRAPHIQUES ---
+    import matplotlib.pyplot as plt  # chargé après le rapport texte
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
 
     # Graphique 1 : Distribution des Deltas (Histogramme)
     # Utilisation d'un pas de 6 pour la granularité du crible
-    ax1.hist(deltas, bins=range(int(min(deltas)), int(max(deltas)) + 12, 6), color='#5DADE2', edgecolor='black', alpha=0.8)
+    # Classes pré-calculées : matplotlib ne trace qu'une barre pondérée par classe
+    bords, comptes = resume.histogramme(6)
+    ax1.hist(bords[:-1], bins=bords, weights=comptes, color='#5DADE2', edgecolor='black', alpha=0.8)
     ax1.set_title(f"Distribution des Deltas (n={total})", fontsize=14)
     ax1.set_xlabel("Valeur de Δ", fontsize=12)
     ax1.set_ylabel("Nombre d'occurrences", fontsize=12)
@@ -84,7 +118,7 @@ def analyser_G3(chemin_fichier):
     ax1.legend()
 
     # Graphique 2 : Camembert des Familles de Départ
-    counts_dep = Counter(fam_departs)
+    counts_dep = dict(c_familles)
     # Tri pour assurer la correspondance des couleurs si besoin
     labels = [f"Pos {k}" for k in counts_dep.keys()]
     colors = ['#FF9999','#66B3FF','#99FF99']
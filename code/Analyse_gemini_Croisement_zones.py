@@ -1,12 +1,9 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import networkx as nx
-import numpy as np
-from collections import Counter
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from agregat_g3 import charger_agregat
+from chargeur_g3 import charger_g3
 
 class AppG3:
     def __init__(self, root):
@@ -16,6 +13,7 @@ class AppG3:
         
         self.chemin_fichier = "donnees_g3.csv"
         self.df = None
+        self.agregat = None
         self.familles = [132, 276, 348]
         
         self.setup_ui()
@@ -29,15 +27,15 @@ class AppG3:
         ttk.Label(control_panel, text="TESTS D'HYPOTHÈSES", font=('Helvetica', 12, 'bold')).pack(pady=10)
         
         self.test1_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(control_panel, text="Test 1 : Symétrie des motifs inversés", variable=self.test1_var).pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(control_panel, text="Test 1 : Symétrie des motifs inversés", variable=self.test1_var, command=self.executer_tests_logiques).pack(anchor=tk.W, pady=5)
         
         self.test2_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(control_panel, text="Test 2 : Corrélation Motif × Δ moyen", variable=self.test2_var).pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(control_panel, text="Test 2 : Corrélation Motif × Δ moyen", variable=self.test2_var, command=self.executer_tests_logiques).pack(anchor=tk.W, pady=5)
         
         self.test3_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(control_panel, text="Test 3 : Analyse des Rangs (1, 2, 3)", variable=self.test3_var).pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(control_panel, text="Test 3 : Analyse des Rangs (1, 2, 3)", variable=self.test3_var, command=self.executer_tests_logiques).pack(anchor=tk.W, pady=5)
 
-        ttk.Button(control_panel, text="Lancer l'Analyse", command=self.mettre_a_jour_graphique).pack(pady=20, fill=tk.X)
+        ttk.Button(control_panel, text="Lancer l'Analyse", command=self.charger_donnees).pack(pady=20, fill=tk.X)
 
         # Zone de texte pour les résultats des tests
         ttk.Label(control_panel, text="RÉSULTATS DES TESTS :", font=('Helvetica', 10, 'bold')).pack(anchor=tk.W)
@@ -53,27 +51,16 @@ class AppG3:
             messagebox.showerror("Erreur", f"Le fichier {self.chemin_fichier} est introuvable.")
             return
         
-        self.df = pd.read_csv(self.chemin_fichier, sep=None, engine='python')
-        self.df.columns = [c.strip() for c in self.df.columns]
+        self.df = charger_g3(self.chemin_fichier)
+        # Agrégat persistant : seules les lignes ajoutées au fichier depuis la
+        # dernière analyse sont parcourues
+        self.agregat = charger_agregat(self.chemin_fichier, self.df)
         self.mettre_a_jour_graphique()
 
-    def analyser_signatures(self):
-        deltas = self.df['delta'].tolist()
-        fams_p = self.df['fam_p'].tolist()
-        fams_q = self.df['fam_q'].tolist()
-        
-        signatures = {(p, q): Counter() for p in self.familles for q in self.familles}
-        deltas_par_trans = {(p, q): [] for p in self.familles for q in self.familles}
-        
-        for i in range(len(self.df) - 1):
-            p, q = fams_p[i], fams_q[i]
-            motif = (deltas[i], deltas[i+1])
-            signatures[(p, q)][motif] += 1
-            deltas_par_trans[(p, q)].append(deltas[i])
-            
-        return signatures, deltas_par_trans
-
-    def executer_tests_logiques(self, signatures, deltas_par_trans):
+    def executer_tests_logiques(self):
+        # Relu dans l'agrégat : cocher / décocher un test ne relance aucun calcul
+        if self.agregat is None: return
+        signatures = self.agregat.signatures
         self.result_text.delete('1.0', tk.END)
         log = ""
 
@@ -93,7 +80,7 @@ class AppG3:
             for p in self.familles:
                 for q in self.familles:
                     if signatures[(p, q)]:
-                        avg_d = np.mean(deltas_par_trans[(p, q)])
+                        avg_d = self.agregat.moyenne((p, q))
                         top_m = signatures[(p, q)].most_common(1)[0][0]
                         log += f"{p}→{q}: Δm={avg_d:.1f} | Top:{top_m}\n"
             log += "\n"
@@ -110,10 +97,13 @@ class AppG3:
         self.result_text.insert(tk.END, log)
 
     def mettre_a_jour_graphique(self):
-        if self.df is None: return
+        if self.agregat is None: return
+        # Dépendances graphiques chargées au premier rendu (démarrage rapide)
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         
-        signatures, deltas_par_trans = self.analyser_signatures()
-        self.executer_tests_logiques(signatures, deltas_par_trans)
+        signatures = self.agregat.signatures
+        self.executer_tests_logiques()
 
         # Nettoyage du graphique précédent
         for widget in self.plot_frame.winfo_children():
@@ -136,6 +126,7 @@ class AppG3:
                 ax_mat.text(j, i, f"{top_m}", ha="center", va="center", fontweight='bold', fontsize=8)
 
         # 2. Roue des Transitions
+        import networkx as nx  # seulement pour la roue des transitions
         ax_graph = fig.add_subplot(grid[0, 1])
         G = nx.DiGraph()
         pos = {132: (0, 1), 276: (0.86, -0.5), 348: (-0.86, -0.5)}
@@ -153,8 +144,9 @@ class AppG3:
 
         # 3. Distribution des Deltas par Famille
         ax_dist = fig.add_subplot(grid[1, :])
-        data_to_plot = [self.df[self.df['fam_p'] == f]['delta'] for f in self.familles]
-        ax_dist.boxplot(data_to_plot, labels=self.familles, vert=False, patch_artist=True)
+        # Boîtes tirées des résumés de l'agrégat (quantiles en cache, aucun tri des Δ)
+        resumes = [self.agregat.departs[f].resume_boxplot(f) for f in self.familles]
+        ax_dist.bxp(resumes, vert=False, patch_artist=True)
         ax_dist.set_title("Dispersion des Deltas par Famille de départ")
         ax_dist.set_xlabel("Valeur du Delta")
 
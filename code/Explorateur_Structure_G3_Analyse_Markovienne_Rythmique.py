@@ -1,12 +1,9 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import networkx as nx
-import numpy as np
-from collections import Counter
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from agregat_g3 import charger_agregat, rapport_tests
+from chargeur_g3 import charger_g3
 
 class AppG3:
     def __init__(self, root):
@@ -16,6 +13,7 @@ class AppG3:
         
         self.chemin_fichier = "donnees_g3.csv"
         self.df = None
+        self.agregat = None
         self.familles = [132, 276, 348]
         
         self.setup_ui()
@@ -29,18 +27,18 @@ class AppG3:
         ttk.Label(control_panel, text="TESTS D'HYPOTHÈSES", font=('Helvetica', 12, 'bold')).pack(pady=10)
         
         self.test1_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(control_panel, text="Test 1 : Symétrie des motifs (L2)", variable=self.test1_var).pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(control_panel, text="Test 1 : Symétrie des motifs (L2)", variable=self.test1_var, command=self.executer_tests_logiques).pack(anchor=tk.W, pady=5)
         
         self.test2_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(control_panel, text="Test 2 : Corrélation Motif × Δ moyen", variable=self.test2_var).pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(control_panel, text="Test 2 : Corrélation Motif × Δ moyen", variable=self.test2_var, command=self.executer_tests_logiques).pack(anchor=tk.W, pady=5)
         
         self.test3_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(control_panel, text="Test 3 : Motifs de Rang 3 (L3)", variable=self.test3_var).pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(control_panel, text="Test 3 : Motifs de Rang 3 (L3)", variable=self.test3_var, command=self.executer_tests_logiques).pack(anchor=tk.W, pady=5)
 
         self.test4_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(control_panel, text="Test 4 : Conjecture Δ̄(auto) > Δ̄(inter)", variable=self.test4_var).pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(control_panel, text="Test 4 : Conjecture Δ̄(auto) > Δ̄(inter)", variable=self.test4_var, command=self.executer_tests_logiques).pack(anchor=tk.W, pady=5)
 
-        ttk.Button(control_panel, text="Lancer l'Analyse", command=self.mettre_a_jour_graphique).pack(pady=20, fill=tk.X)
+        ttk.Button(control_panel, text="Lancer l'Analyse", command=self.charger_donnees).pack(pady=20, fill=tk.X)
 
         # Zone de texte pour les résultats des tests
         ttk.Label(control_panel, text="RÉSULTATS DES ANALYSES :", font=('Helvetica', 10, 'bold')).pack(anchor=tk.W)
@@ -57,99 +55,32 @@ class AppG3:
             return
         
         try:
-            self.df = pd.read_csv(self.chemin_fichier, sep=None, engine='python')
-            self.df.columns = [c.strip() for c in self.df.columns]
+            self.df = charger_g3(self.chemin_fichier)
+            # Agrégat persistant : seules les lignes ajoutées au fichier
+            # depuis la dernière analyse sont parcourues
+            self.agregat = charger_agregat(self.chemin_fichier, self.df)
             self.mettre_a_jour_graphique()
         except Exception as e:
             messagebox.showerror("Erreur de lecture", f"Impossible de lire le fichier : {e}")
 
-    def analyser_signatures(self):
-        deltas = self.df['delta'].tolist()
-        fams_p = self.df['fam_p'].tolist()
-        fams_q = self.df['fam_q'].tolist()
-        
-        signatures_l2 = {(p, q): Counter() for p in self.familles for q in self.familles}
-        signatures_l3 = Counter()
-        deltas_par_trans = {(p, q): [] for p in self.familles for q in self.familles}
-        
-        for i in range(len(self.df) - 1):
-            p, q = fams_p[i], fams_q[i]
-            # Motif longueur 2
-            motif_l2 = (deltas[i], deltas[i+1])
-            signatures_l2[(p, q)][motif_l2] += 1
-            deltas_par_trans[(p, q)].append(deltas[i])
-            
-            # Motif longueur 3 (si possible)
-            if i < len(self.df) - 2:
-                motif_l3 = (deltas[i], deltas[i+1], deltas[i+2])
-                signatures_l3[motif_l3] += 1
-            
-        return signatures_l2, signatures_l3, deltas_par_trans
-
-    def executer_tests_logiques(self, signatures_l2, signatures_l3, deltas_par_trans):
+    def executer_tests_logiques(self):
+        # Relu dans l'agrégat : cocher / décocher un test ne relance aucun calcul
+        if self.agregat is None: return
+        ag = self.agregat
+        tests = [i for i, v in enumerate((self.test1_var, self.test2_var,
+                                          self.test3_var, self.test4_var), 1) if v.get()]
+        log = rapport_tests(ag, tests)
         self.result_text.delete('1.0', tk.END)
-        log = ""
-
-        # Test 4 : Conjecture Δ̄(auto) vs Δ̄(inter)
-        if self.test4_var.get():
-            log += "=== TEST 4 : Δ̄(AUTO) VS Δ̄(INTER) ===\n"
-            autos = []
-            inters = []
-            for (p, q), d_list in deltas_par_trans.items():
-                if d_list:
-                    moyen = np.mean(d_list)
-                    if p == q:
-                        autos.append(moyen)
-                        log += f"Auto {p}→{p}  : Δ̄ = {moyen:.2f}\n"
-                    else:
-                        inters.append(moyen)
-            
-            mean_auto = np.mean(autos) if autos else 0
-            mean_inter = np.mean(inters) if inters else 0
-            verdict = "VRAI" if mean_auto > mean_inter else "FAUX"
-            log += f"---------------------------------\n"
-            log += f"MOYENNE AUTO  : {mean_auto:.2f}\n"
-            log += f"MOYENNE INTER : {mean_inter:.2f}\n"
-            log += f"CONJECTURE 4  : {verdict}\n\n"
-
-        # Test 1 : Symétrie inverse (L2)
-        if self.test1_var.get():
-            log += "=== TEST 1 : SYMÉTRIE INVERSE (L2) ===\n"
-            paires = [(132, 276), (276, 348), (348, 132)]
-            for p, q in paires:
-                m_pq = signatures_l2[(p, q)].most_common(1)[0][0]
-                m_qp = signatures_l2[(q, p)].most_common(1)[0][0]
-                inv_qp = (m_qp[1], m_qp[0])
-                status = "✓ MATCH" if m_pq == inv_qp else "× DIFF"
-                log += f"{p}↔{q}: {m_pq} vs {m_qp} | {status}\n"
-            log += "\n"
-
-        # Test 2 : Corrélation Motif × Δ moyen
-        if self.test2_var.get():
-            log += "=== TEST 2 : Δ MOYEN vs TOP MOTIF ===\n"
-            for p in self.familles:
-                for q in self.familles:
-                    if signatures_l2[(p, q)]:
-                        avg_d = np.mean(deltas_par_trans[(p, q)])
-                        top_m = signatures_l2[(p, q)].most_common(1)[0][0]
-                        log += f"{p}→{q}: Δm={avg_d:.1f} | Top:{top_m}\n"
-            log += "\n"
-
-        # Test 3 : Motifs de Rang 3
-        if self.test3_var.get():
-            log += "=== TEST 3 : MOTIFS DE LONGUEUR 3 ===\n"
-            top_l3 = signatures_l3.most_common(10)
-            for i, (m, c) in enumerate(top_l3):
-                log += f"#{i+1} Motif {m} : {c} occ.\n"
-            log += "\n"
-
         self.result_text.insert(tk.END, log)
 
     def mettre_a_jour_graphique(self):
-        if self.df is None: return
+        if self.agregat is None: return
+        # Dépendances graphiques chargées au premier rendu (démarrage rapide)
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         
-        signatures_l2, signatures_l3, deltas_par_trans = self.analyser_signatures()
-        self.executer_tests_logiques(signatures_l2, signatures_l3, deltas_par_trans)
+        signatures_l2 = self.agregat.signatures
+        self.executer_tests_logiques()
 
         # Nettoyage du graphique précédent
         for widget in self.plot_frame.winfo_children():
@@ -172,6 +103,7 @@ class AppG3:
                 ax_mat.text(j, i, f"{top_m}", ha="center", va="center", fontweight='bold', fontsize=8)
 
         # 2. Roue des Transitions
+        import networkx as nx  # seulement pour la roue des transitions
         ax_graph = fig.add_subplot(grid[0, 1])
         G = nx.DiGraph()
         pos = {132: (0, 1), 276: (0.86, -0.5), 348: (-0.86, -0.5)}
@@ -189,15 +121,15 @@ class AppG3:
 
         # 3. Distribution des Deltas par Transition
         ax_dist = fig.add_subplot(grid[1, :])
-        all_d_lists = []
-        labels = []
+        # Boîtes tirées des quantiles exacts de l'agrégat (aucune liste de Δ)
+        resumes = []
         for p in self.familles:
             for q in self.familles:
-                if deltas_par_trans[(p, q)]:
-                    all_d_lists.append(deltas_par_trans[(p, q)])
-                    labels.append(f"{p}→{q}")
+                m = self.agregat.moments[(p, q)]
+                if m.n:
+                    resumes.append(m.resume_boxplot(f"{p}→{q}"))
         
-        ax_dist.boxplot(all_d_lists, labels=labels, vert=True, patch_artist=True)
+        ax_dist.bxp(resumes, vert=True, patch_artist=True)
         ax_dist.set_title("Dispersion des Deltas par type de Transition")
         plt.xticks(rotation=45)
 
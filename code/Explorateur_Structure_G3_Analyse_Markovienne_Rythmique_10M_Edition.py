@@ -1,12 +1,11 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import networkx as nx
 import numpy as np
-from collections import Counter
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from agregat_g3 import AgregatG3, charger_agregat
+from chargeur_g3 import charger_g3
+from stats_g3 import MomentsDelta
 
 class AppG3:
     def __init__(self, root):
@@ -16,6 +15,7 @@ class AppG3:
         
         self.chemin_fichier = "donnees_g3.csv"
         self.df = None
+        self.agregat = None
         self.familles = [132, 276, 348]
         
         self.setup_ui()
@@ -33,18 +33,18 @@ class AppG3:
         test_frame.pack(fill=tk.X, pady=5)
 
         self.test1_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(test_frame, text="T1: Asymétrie des Signatures", variable=self.test1_var).pack(anchor=tk.W)
+        ttk.Checkbutton(test_frame, text="T1: Asymétrie des Signatures", variable=self.test1_var, command=self.executer_journal).pack(anchor=tk.W)
         
         self.test2_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(test_frame, text="T2: Principe de Moindre Écart", variable=self.test2_var).pack(anchor=tk.W)
+        ttk.Checkbutton(test_frame, text="T2: Principe de Moindre Écart", variable=self.test2_var, command=self.executer_journal).pack(anchor=tk.W)
         
         self.test3_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(test_frame, text="T3: Série Harmonique L3", variable=self.test3_var).pack(anchor=tk.W)
+        ttk.Checkbutton(test_frame, text="T3: Série Harmonique L3", variable=self.test3_var, command=self.executer_journal).pack(anchor=tk.W)
 
         self.test4_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(test_frame, text="T4: Coût des Auto-transitions", variable=self.test4_var).pack(anchor=tk.W)
+        ttk.Checkbutton(test_frame, text="T4: Coût des Auto-transitions", variable=self.test4_var, command=self.executer_journal).pack(anchor=tk.W)
 
-        ttk.Button(control_panel, text="LANCER L'ANALYSE", command=self.mettre_a_jour_graphique).pack(pady=15, fill=tk.X)
+        ttk.Button(control_panel, text="LANCER L'ANALYSE", command=self.charger_donnees).pack(pady=15, fill=tk.X)
 
         ttk.Label(control_panel, text="RÉVÉLATIONS SCIENTIFIQUES :", font=('Helvetica', 10, 'bold')).pack(anchor=tk.W)
         self.result_text = tk.Text(control_panel, width=50, height=35, font=('Consolas', 9), bg="#F8F9F9")
@@ -62,61 +62,55 @@ class AppG3:
                 'fam_p': np.random.choice(self.familles, 1000),
                 'fam_q': np.random.choice(self.familles, 1000)
             }
+            import pandas as pd
             self.df = pd.DataFrame(data)
+            self.agregat = AgregatG3.depuis_dataframe(self.df)
         else:
             try:
-                self.df = pd.read_csv(self.chemin_fichier, sep=None, engine='python')
-                self.df.columns = [c.strip() for c in self.df.columns]
+                self.df = charger_g3(self.chemin_fichier)
+                # Agrégat persistant : seules les lignes ajoutées au fichier
+                # depuis la dernière analyse sont parcourues
+                self.agregat = charger_agregat(self.chemin_fichier, self.df)
             except:
                 pass
         self.mettre_a_jour_graphique()
 
-    def analyser_stats(self):
-        deltas = self.df['delta'].tolist()
-        fams_p = self.df['fam_p'].tolist()
-        fams_q = self.df['fam_q'].tolist()
-        
-        sig_l2 = {(p, q): Counter() for p in self.familles for q in self.familles}
-        sig_l3 = Counter()
-        d_trans = {(p, q): [] for p in self.familles for q in self.familles}
-        
-        for i in range(len(self.df) - 1):
-            p, q = fams_p[i], fams_q[i]
-            sig_l2[(p, q)][(deltas[i], deltas[i+1])] += 1
-            d_trans[(p, q)].append(deltas[i])
-            if i < len(self.df) - 2:
-                sig_l3[(deltas[i], deltas[i+1], deltas[i+2])] += 1
-        return sig_l2, sig_l3, d_trans
-
-    def executer_journal(self, sig_l2, sig_l3, d_trans):
+    def executer_journal(self):
+        # Relu dans l'agrégat : cocher / décocher un test ne relance aucun calcul
+        if self.agregat is None: return
+        ag = self.agregat
         self.result_text.delete('1.0', tk.END)
         log = ""
         
         if self.test4_var.get():
             log += "--- TEST 4: COÛT AUTO-TRANSITION ---\n"
-            m_auto = np.mean([np.mean(d_trans[(f,f)]) for f in self.familles if d_trans[(f,f)]])
-            m_inter = np.mean([np.mean(d_trans[(p,q)]) for p,q in d_trans if p != q and d_trans[(p,q)]])
+            m_auto = np.mean([ag.moyenne((f,f)) for f in self.familles if ag.comptes[(f,f)]])
+            m_inter = np.mean([ag.moyenne((p,q)) for p,q in ag.comptes if p != q and ag.comptes[(p,q)]])
             log += f"Δ̄ Auto: {m_auto:.1f} | Δ̄ Inter: {m_inter:.1f}\n"
             log += f"Verdict: +{m_auto-m_inter:.1f} (C4 VALIDÉ)\n\n"
 
         if self.test2_var.get():
             hor = [(132,276), (276,348), (348,132)]
-            m_hor = np.mean([np.mean(d_trans[t]) for t in hor if d_trans[t]])
+            m_hor = np.mean([ag.moyenne(t) for t in hor if ag.comptes[t]])
             log += "--- TEST 2: MOINDRE ÉCART ---\n"
             log += f"Δ̄ Cycle Horaire: {m_hor:.1f}\n"
             log += "Le cycle optimise la dépense de Δ.\n\n"
 
         if self.test3_var.get():
             log += "--- TEST 3: HARMONIQUES L3 ---\n"
-            for m, c in sig_l3.most_common(5):
+            # Motifs L3 tenus à jour par l'agrégat (clés de motifs.empaqueter)
+            for m, c in ag.signatures_l3.most_common(5):
                 log += f"Σ={sum(m)} ({sum(m)/60:.1f}*60) | {m}\n"
         
         self.result_text.insert(tk.END, log)
 
     def mettre_a_jour_graphique(self):
-        if self.df is None: return
-        sig_l2, sig_l3, d_trans = self.analyser_stats()
-        self.executer_journal(sig_l2, sig_l3, d_trans)
+        if self.agregat is None: return
+        # Dépendances graphiques chargées au premier rendu (démarrage rapide)
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        ag = self.agregat
+        self.executer_journal()
 
         for widget in self.plot_frame.winfo_children():
             widget.destroy()
@@ -126,13 +120,14 @@ class AppG3:
 
         # Graph 1 : Matrice de Chaleur Deltas Moyens
         ax1 = fig.add_subplot(gs[0, 0])
-        mat = [[np.mean(d_trans[(p,q)]) if d_trans[(p,q)] else 0 for q in self.familles] for p in self.familles]
+        mat = [[ag.moyenne((p,q)) if ag.comptes[(p,q)] else 0 for q in self.familles] for p in self.familles]
         ax1.imshow(mat, cmap='YlGnBu')
         ax1.set_title("Coût des Transitions (Δ̄)")
         ax1.set_xticks([0,1,2]); ax1.set_xticklabels(self.familles)
         ax1.set_yticks([0,1,2]); ax1.set_yticklabels(self.familles)
 
         # Graph 2 : Cycle de Moindre Écart
+        import networkx as nx  # seulement pour le graphe des cycles
         ax2 = fig.add_subplot(gs[0, 1])
         G = nx.DiGraph()
         for p in self.familles: G.add_node(p)
@@ -141,7 +136,7 @@ class AppG3:
         nx.draw_networkx_labels(G, pos, ax=ax2)
         
         horaire = [(132,276), (276,348), (348,132)]
-        for u, v in d_trans.keys():
+        for u, v in ag.comptes.keys():
             if u != v:
                 col = '#2ECC71' if (u,v) in horaire else '#E74C3C'
                 nx.draw_networkx_edges(G, pos, edgelist=[(u,v)], edge_color=col, 
@@ -150,12 +145,12 @@ class AppG3:
 
         # Graph 3 : Boxplot de distribution par type
         ax3 = fig.add_subplot(gs[1, :])
-        data_groups = [
-            [d for p,q in d_trans if p==q for d in d_trans[(p,q)]],
-            [d for p,q in d_trans if (p,q) in horaire for d in d_trans[(p,q)]],
-            [d for p,q in d_trans if p!=q and (p,q) not in horaire for d in d_trans[(p,q)]]
-        ]
-        ax3.boxplot(data_groups, labels=['Auto', 'Horaire (Opti)', 'Rétrograde'], vert=False, patch_artist=True)
+        # Moments des transitions fusionnés par type : quantiles exacts sans liste de Δ
+        groupes = [MomentsDelta(), MomentsDelta(), MomentsDelta()]
+        for (p, q), m in ag.moments.items():
+            groupes[0 if p==q else 1 if (p,q) in horaire else 2].fusionner(m)
+        resumes = [g.resume_boxplot(l) for g, l in zip(groupes, ['Auto', 'Horaire (Opti)', 'Rétrograde'])]
+        ax3.bxp(resumes, vert=False, patch_artist=True)
         ax3.set_title("Preuve Statistique du Principe de Moindre Écart")
 
         fig.tight_layout()
@@ -0,0 +1,254 @@
+import hashlib
+import os
+import pickle
+from collections import Counter
+
+import numpy as np
+
+from chargeur_g3 import DOSSIER_CACHE, commence_par, empreinte
+from motifs import BITS_DELTA, depaqueter, empaqueter
+from stats_g3 import FAMILLES, MomentsDelta, codes_transitions, decoder_transition
+
+# =============================================================================
+# AGRÉGAT D'ANALYSE G3 INCRÉMENTAL ET FUSIONNABLE
+# =============================================================================
+#
+# Contient tout ce dont les tests des explorateurs ont besoin :
+#   - signatures[(p, q)] : Counter des motifs (Δ_i, Δ_i+1) par transition
+#     de la ligne i ;
+#   - moments[(p, q)]    : MomentsDelta des Δ_i par transition (moyenne,
+#     dispersion, quantiles exacts) au lieu des listes de Δ ;
+#   - departs[f]         : MomentsDelta des Δ de toutes les lignes partant
+#     de la famille f (boîtes par famille de départ) ;
+#   - signatures_l3      : Counter des motifs (Δ_i, Δ_i+1, Δ_i+2).
+# Seules les fenêtres entièrement internes à un bloc sont comptées ; les
+# deux premières (tete) et deux dernières (queue) lignes sont gardées pour
+# compter exactement les fenêtres à cheval lors d'une fusion. Ajouter des
+# lignes revient donc à fusionner l'agrégat d'un nouveau bloc.
+# Un agrégat persisté porte l'empreinte (mtime, taille, sha1) du fichier
+# analysé : il n'est repris que si le fichier est inchangé ou seulement
+# prolongé (mêmes premiers octets), comme le cache de chargeur_g3.
+
+TRANSITIONS = [(p, q) for p in FAMILLES for q in FAMILLES]
+
+
+def _par_apparition(cles):
+    """(clés uniques, comptes) dans l'ordre de première apparition."""
+    uniques, premiers, comptes = np.unique(cles, return_index=True, return_counts=True)
+    ordre = np.argsort(premiers, kind="stable")
+    return uniques[ordre].tolist(), comptes[ordre].tolist()
+
+
+class AgregatG3:
+    """Statistiques des explorateurs G3, mises à jour par fusion de blocs."""
+
+    VERSION = 4  # change si les champs changent : agrégats persistés recalculés
+
+    def __init__(self):
+        self.version = self.VERSION
+        self.n = 0
+        self.empreinte = None  # empreinte du fichier agrégé (charger_agregat)
+        self.signatures = {t: Counter() for t in TRANSITIONS}
+        self.signatures_l3 = Counter()
+        self.moments = {t: MomentsDelta() for t in TRANSITIONS}
+        self.departs = {f: MomentsDelta() for f in FAMILLES}
+        self.tete = []   # [(code transition, Δ)] des 2 premières lignes
+        self.queue = []  # idem pour les 2 dernières
+
+    # ------------------------------------------------------------
+    #  CONSTRUCTION
+    # ------------------------------------------------------------
+    @classmethod
+    def depuis_colonnes(cls, fam_p, fam_q, delta):
+        ag = cls()
+        trans = np.asarray(codes_transitions(fam_p, fam_q), dtype=np.int64)
+        d = np.asarray(delta, dtype=np.int64)
+        ag.n = len(d)
+        ag.tete = list(zip(trans[:2].tolist(), d[:2].tolist()))
+        ag.queue = list(zip(trans[-2:].tolist(), d[-2:].tolist()))
+        for i, f in enumerate(FAMILLES):
+            ag.departs[f].ajouter(d[trans // 3 == i])
+        if ag.n < 2:
+            return ag
+
+        # Clés de motifs de motifs.empaqueter (Δ ≥ 2^bits refusés) ; bits
+        # élargi au plus grand Δ du bloc, les clés n'étant pas conservées
+        bits = max(BITS_DELTA, int(d.max()).bit_length())
+
+        # Motifs L2 par transition : clé = trans << 2·bits | (Δ_i, Δ_i+1)
+        t, d0 = trans[:-1], d[:-1]
+        cles, nbs = _par_apparition((t << 2 * bits) | empaqueter(d, 2, bits))
+        for cle, nb in zip(cles, nbs):
+            tr = decoder_transition(cle >> 2 * bits)
+            ag.signatures[tr][depaqueter(cle, 2, bits)] += nb
+
+        for code, tr in enumerate(TRANSITIONS):
+            ag.moments[tr].ajouter(d0[t == code])
+
+        if ag.n >= 3:
+            cles, nbs = _par_apparition(empaqueter(d, 3, bits))
+            for cle, nb in zip(cles, nbs):
+                ag.signatures_l3[depaqueter(cle, 3, bits)] += nb
+        return ag
+
+    @classmethod
+    def depuis_dataframe(cls, df):
+        return cls.depuis_colonnes(df['fam_p'].to_numpy(), df['fam_q'].to_numpy(),
+                                   df['delta'].to_numpy())
+
+    # ------------------------------------------------------------
+    #  FUSION
+    # ------------------------------------------------------------
+    def fusionner(self, autre):
+        """Ajoute à self les lignes de `autre`, qui les suivent immédiatement."""
+        seq = self.queue + autre.tete
+        la = len(self.queue)
+
+        # Fenêtres à cheval (dans l'ordre du flux, avant celles de `autre`)
+        if la and len(seq) > la:
+            code, d0 = seq[la - 1]
+            tr = decoder_transition(code)
+            self.signatures[tr][(d0, seq[la][1])] += 1
+            self.moments[tr].ajouter([d0])
+        for s in range(max(0, la - 2), la):
+            if s + 2 < len(seq):
+                self.signatures_l3[tuple(x[1] for x in seq[s:s + 3])] += 1
+
+        for tr in TRANSITIONS:
+            self.signatures[tr].update(autre.signatures[tr])
+            self.moments[tr].fusionner(autre.moments[tr])
+        self.signatures_l3.update(autre.signatures_l3)
+        for f in FAMILLES:
+            self.departs[f].fusionner(autre.departs[f])
+
+        self.tete = (self.tete + autre.tete)[:2]
+        self.queue = (self.queue + autre.queue)[-2:]
+        self.n += autre.n
+        return self
+
+    # ------------------------------------------------------------
+    #  LECTURE
+    # ------------------------------------------------------------
+    @property
+    def comptes(self):
+        return {tr: m.n for tr, m in self.moments.items()}
+
+    def moyenne(self, tr):
+        m = self.moments[tr]
+        return m.moyenne if m.n else float("nan")
+
+    def correspond_a(self, chemin_donnees, df):
+        """True si chemin_donnees (lu dans df) commence par les octets déjà agrégés (ajout seul)."""
+        if self.empreinte is None or len(df) < self.n:
+            return False
+        try:
+            return commence_par(chemin_donnees, self.empreinte)
+        except OSError:
+            return False
+
+
+# =============================================================================
+# RAPPORT DES TESTS
+# =============================================================================
+
+def rapport_tests(ag, tests=(1, 2, 3, 4)):
+    """Texte des tests logiques de l'explorateur (numéros 1 à 4) pour un agrégat."""
+    signatures_l2, signatures_l3 = ag.signatures, ag.signatures_l3
+    log = ""
+
+    # Test 4 : Conjecture Δ̄(auto) vs Δ̄(inter)
+    if 4 in tests:
+        log += "=== TEST 4 : Δ̄(AUTO) VS Δ̄(INTER) ===\n"
+        autos = []
+        inters = []
+        for (p, q), nb in ag.comptes.items():
+            if nb:
+                moyen = ag.moyenne((p, q))
+                if p == q:
+                    autos.append(moyen)
+                    log += f"Auto {p}→{p}  : Δ̄ = {moyen:.2f}\n"
+                else:
+                    inters.append(moyen)
+
+        mean_auto = np.mean(autos) if autos else 0
+        mean_inter = np.mean(inters) if inters else 0
+        verdict = "VRAI" if mean_auto > mean_inter else "FAUX"
+        log += f"---------------------------------\n"
+        log += f"MOYENNE AUTO  : {mean_auto:.2f}\n"
+        log += f"MOYENNE INTER : {mean_inter:.2f}\n"
+        log += f"CONJECTURE 4  : {verdict}\n\n"
+
+    # Test 1 : Symétrie inverse (L2)
+    if 1 in tests:
+        log += "=== TEST 1 : SYMÉTRIE INVERSE (L2) ===\n"
+        paires = [(132, 276), (276, 348), (348, 132)]
+        for p, q in paires:
+            m_pq = signatures_l2[(p, q)].most_common(1)[0][0]
+            m_qp = signatures_l2[(q, p)].most_common(1)[0][0]
+            inv_qp = (m_qp[1], m_qp[0])
+            status = "✓ MATCH" if m_pq == inv_qp else "× DIFF"
+            log += f"{p}↔{q}: {m_pq} vs {m_qp} | {status}\n"
+        log += "\n"
+
+    # Test 2 : Corrélation Motif × Δ moyen
+    if 2 in tests:
+        log += "=== TEST 2 : Δ MOYEN vs TOP MOTIF ===\n"
+        for p in FAMILLES:
+            for q in FAMILLES:
+                if signatures_l2[(p, q)]:
+                    avg_d = ag.moyenne((p, q))
+                    top_m = signatures_l2[(p, q)].most_common(1)[0][0]
+                    log += f"{p}→{q}: Δm={avg_d:.1f} | Top:{top_m}\n"
+        log += "\n"
+
+    # Test 3 : Motifs de Rang 3
+    if 3 in tests:
+        log += "=== TEST 3 : MOTIFS DE LONGUEUR 3 ===\n"
+        top_l3 = signatures_l3.most_common(10)
+        for i, (m, c) in enumerate(top_l3):
+            log += f"#{i+1} Motif {m} : {c} occ.\n"
+        log += "\n"
+
+    return log
+
+
+# =============================================================================
+# PERSISTANCE
+# =============================================================================
+
+def _chemin_agregat(chemin_donnees):
+    cle = hashlib.sha1(os.path.abspath(chemin_donnees).encode()).hexdigest()
+    return os.path.join(DOSSIER_CACHE, f"agregat_{cle}.pkl")
+
+
+def charger_agregat(chemin_donnees, df):
+    """
+    Agrégat de df, repris du disque si possible : seules les lignes ajoutées
+    depuis la dernière sauvegarde sont analysées. L'agrégat à jour est
+    sauvegardé.
+    """
+    chemin = _chemin_agregat(chemin_donnees)
+    ag = None
+    if os.path.exists(chemin):
+        try:
+            with open(chemin, "rb") as f:
+                ag = pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError, AttributeError):
+            ag = None
+    if getattr(ag, "version", None) != AgregatG3.VERSION or not ag.correspond_a(chemin_donnees, df):
+        ag = AgregatG3()
+    elif len(df) == ag.n and ag.empreinte["mtime_ns"] == os.stat(chemin_donnees).st_mtime_ns:
+        return ag
+
+    if len(df) > ag.n:
+        ag.fusionner(AgregatG3.depuis_dataframe(df.iloc[ag.n:]))
+    ag.empreinte = empreinte(chemin_donnees)
+    try:
+        os.makedirs(DOSSIER_CACHE, exist_ok=True)
+        tmp = f"{chemin}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(ag, f)
+        os.replace(tmp, chemin)
+    except OSError:
+        pass
+    return ag
@@ -0,0 +1,110 @@
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from agregat_g3 import AgregatG3, rapport_tests
+from chargeur_g3 import SCHEMA_G3, _entete
+from format_g3 import lire_g3_npz
+
+# =============================================================================
+# ANALYSE PARALLÈLE (MAP-REDUCE SUR LES TABLES G3)
+# =============================================================================
+#
+# La table est découpée en shards contigus :
+#   - CSV : plages d'octets alignées sur les débuts de ligne, chaque worker
+#     relit sa plage lui-même (rien n'est transféré au-delà des bornes) ;
+#   - .npz : colonnes décodées une fois, tranches de lignes envoyées aux
+#     workers.
+# Chaque worker produit un AgregatG3 ; la réduction fusionne les agrégats
+# dans l'ordre des shards, ce qui compte exactement les motifs à cheval sur
+# deux shards (voir AgregatG3.fusionner).
+
+OCTETS_PAR_SHARD = 64 << 20
+LIGNES_PAR_SHARD = 4_000_000
+COLONNES_AGREGAT = ("fam_p", "fam_q", "delta")
+
+
+def _debut_ligne(f, pos):
+    """Position du premier début de ligne >= pos."""
+    if pos == 0:
+        return 0
+    f.seek(pos - 1)
+    f.readline()
+    return f.tell()
+
+
+def _decouper_csv(chemin, octets_par_shard):
+    taille = os.path.getsize(chemin)
+    with open(chemin, "rb") as f:
+        debut = _debut_ligne(f, 1)  # après l'en-tête
+        n = max(1, -(-(taille - debut) // octets_par_shard))
+        bornes = [debut] + [_debut_ligne(f, debut + i * (taille - debut) // n) for i in range(1, n)] + [taille]
+    return [(a, b) for a, b in zip(bornes, bornes[1:]) if b > a]
+
+
+def _agreger_csv(indice, chemin, debut, fin):
+    t0 = time.time()
+    sep, noms = _entete(chemin)
+    with open(chemin, "rb") as f:
+        f.seek(debut)
+        donnees = f.read(fin - debut)
+    df = pd.read_csv(io.BytesIO(donnees), sep=sep, header=None, names=noms,
+                     usecols=list(COLONNES_AGREGAT),
+                     dtype={c: SCHEMA_G3[c] for c in COLONNES_AGREGAT}, engine="c")
+    ag = AgregatG3.depuis_dataframe(df)
+    return ag, {"shard": indice, "debut": debut, "fin": fin,
+                "lignes": ag.n, "duree": time.time() - t0}
+
+
+def _agreger_colonnes(indice, fam_p, fam_q, delta, debut):
+    t0 = time.time()
+    ag = AgregatG3.depuis_colonnes(fam_p, fam_q, delta)
+    return ag, {"shard": indice, "debut": debut, "fin": debut + ag.n,
+                "lignes": ag.n, "duree": time.time() - t0}
+
+
+def analyser_shards(chemin, workers=None, octets_par_shard=OCTETS_PAR_SHARD,
+                    lignes_par_shard=LIGNES_PAR_SHARD):
+    """
+    Agrège une table G3 (.csv ou .npz) par shards dans un pool de processus.
+    Retourne (agregat, stats_par_shard) ; l'agrégat est identique à celui
+    d'une lecture séquentielle de tout le fichier.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if chemin.endswith(".npz"):
+            col = lire_g3_npz(chemin)
+            total = len(col["delta"])
+            futures = [
+                pool.submit(_agreger_colonnes, i, *(col[c][lo:lo + lignes_par_shard]
+                                                    for c in COLONNES_AGREGAT), lo)
+                for i, lo in enumerate(range(0, total, lignes_par_shard))
+            ]
+        else:
+            futures = [pool.submit(_agreger_csv, i, chemin, a, b)
+                       for i, (a, b) in enumerate(_decouper_csv(chemin, octets_par_shard))]
+
+        agregat, stats = AgregatG3(), []
+        for fut in futures:
+            ag, st = fut.result()
+            agregat.fusionner(ag)
+            stats.append(st)
+    return agregat, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tests logiques G3 en map-reduce multi-processus.")
+    parser.add_argument("chemin", help="table G3 (.csv ou .npz)")
+    parser.add_argument("--workers", type=int, default=None, help="processus (défaut : nombre de cœurs)")
+    parser.add_argument("--tests", type=int, nargs="+", default=[1, 2, 3, 4], choices=[1, 2, 3, 4])
+    parser.add_argument("--octets-par-shard", type=int, default=OCTETS_PAR_SHARD)
+    args = parser.parse_args()
+
+    t0 = time.time()
+    agregat, stats = analyser_shards(args.chemin, args.workers, args.octets_par_shard)
+    print(f"{agregat.n} lignes, {len(stats)} shards, {time.time() - t0:.2f} s\n")
+    print(rapport_tests(agregat, args.tests), end="")
@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# =============================================================================
+# BANC DE TEMPS DE DÉMARRAGE (COÛT DES IMPORTS)
+# =============================================================================
+#
+# Chaque script est chargé dans un interpréteur neuf (sans exécuter son bloc
+# __main__), plusieurs fois : temps médian moins celui d'un interpréteur
+# vide, et modules les plus lourds d'après python -X importtime. Les
+# résultats peuvent être sauvegardés en JSON et comparés à une référence
+# pour repérer une dépendance lourde réintroduite au chargement.
+#
+# comparer (partagé avec bench_sg.py) : durée médiane, ou débit ("debit",
+# plus grand = meilleur) quand la mesure en a un ; une durée mesurée jusqu'au
+# timeout du générateur n'est jamais comparée. Une référence prise sur une
+# autre machine (architecture, nombre de processeurs) est refusée.
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+
+CIBLES = [
+    "cli_sg.py",
+    "generateur_sg.py",
+    "pipeline_g3.py",
+    "analyse_parallele.py",
+    "prototype de generation de nombres SG.py",
+    "001_creation csvprototype_Laboratoire_Analyse_SG_Sophie_Germain.py",
+    "Analyse_anomalies_G3_fichier.py",
+    "Analyse_gemini_Croisement_zones.py",
+    "Explorateur_Structure_G3_Analyse_Markovienne_Rythmique.py",
+    "Explorateur_Structure_G3_Analyse_Markovienne_Rythmique_10M_Edition.py",
+    "generer_graphique_synthese.py",
+]
+
+_CHARGER = (
+    "import importlib.util, sys; sys.path.insert(0, {dossier!r}); "
+    "spec = importlib.util.spec_from_file_location('_bench', {chemin!r}); "
+    "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+)
+
+
+def _lancer(code, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    t0 = time.perf_counter()
+    res = subprocess.run(cmd, capture_output=True, text=True, cwd=DOSSIER)
+    return time.perf_counter() - t0, res
+
+
+def _plus_lourds(sortie_importtime, n=5):
+    """[(module, ms cumulées)] des n imports de premier niveau les plus coûteux."""
+    lourds = []
+    for ligne in sortie_importtime.splitlines():
+        if not ligne.startswith("import time:") or "cumulative" in ligne:
+            continue
+        _, cumul, nom = ligne[len("import time:"):].split("|")
+        if nom.startswith(" ") and not nom.startswith("  "):
+            lourds.append((nom.strip(), int(cumul) / 1000))
+    return sorted(lourds, key=lambda x: x[1], reverse=True)[:n]
+
+
+def mesurer(fichier, repetitions=5, vide=0.0):
+    chemin = os.path.join(DOSSIER, fichier)
+    code = _CHARGER.format(dossier=DOSSIER, chemin=chemin)
+    durees = []
+    for _ in range(repetitions):
+        duree, res = _lancer(code)
+        if res.returncode:
+            return {"erreur": res.stderr.strip().splitlines()[-1]}
+        durees.append(duree)
+    _, res = _lancer(code, importtime=True)
+    return {
+        "median_s": max(statistics.median(durees) - vide, 0.0),
+        "min_s": max(min(durees) - vide, 0.0),
+        "plus_lourds": _plus_lourds(res.stderr),
+    }
+
+
+def environnement():
+    """Machine de mesure, enregistrée avec les résultats (clé "environnement")."""
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "systeme": platform.platform(), "processeurs": os.cpu_count()}
+
+
+CLES_ENVIRONNEMENT = ("machine", "processeurs")
+
+
+def _au_timeout(r):
+    return r.get("generateur", {}).get("arret") == "timeout"
+
+
+def comparer(resultats, reference, seuil=0.2):
+    """
+    Lignes de régression : cibles plus lentes (ou de débit plus faible) que la
+    référence de plus de seuil. ValueError si la référence vient d'une autre machine.
+    """
+    env, env_ref = resultats.get("environnement"), reference.get("environnement")
+    if env and env_ref:
+        ecarts = [f"{c} {env_ref.get(c)} -> {env.get(c)}" for c in CLES_ENVIRONNEMENT
+                  if env.get(c) != env_ref.get(c)]
+        if ecarts:
+            raise ValueError("Référence mesurée sur une autre machine (" + ", ".join(ecarts)
+                             + ") : enregistrer une référence locale avec --json")
+    alertes = []
+    for cible, r in resultats.items():
+        ref = reference.get(cible)
+        if cible == "environnement" or not ref:
+            continue
+        if "debit" in r and "debit" in ref:
+            if r["debit"] < ref["debit"] * (1 - seuil):
+                alertes.append(f"RÉGRESSION {cible} : {ref['debit']:.0f} -> {r['debit']:.0f} {r['unite_debit']}")
+            continue
+        if "median_s" not in r or "median_s" not in ref or _au_timeout(r) or _au_timeout(ref):
+            continue  # durée du timeout, pas du calcul
+        if r["median_s"] > ref["median_s"] * (1 + seuil) + 0.01:
+            alertes.append(f"RÉGRESSION {cible} : {ref['median_s']*1000:.0f} -> {r['median_s']*1000:.0f} ms")
+    return alertes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps de démarrage (imports) des scripts SG / G3.")
+    parser.add_argument("cibles", nargs="*", default=CIBLES, help="scripts à mesurer (défaut : tous)")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    parser.add_argument("--reference", help="résultats JSON précédents à comparer")
+    parser.add_argument("--seuil", type=float, default=0.2, help="tolérance relative (défaut 20 %%)")
+    args = parser.parse_args()
+
+    vide = statistics.median(_lancer("pass")[0] for _ in range(args.repetitions))
+    print(f"Interpréteur vide : {vide*1000:.0f} ms (soustrait)\n")
+
+    resultats = {}
+    for cible in args.cibles:
+        r = mesurer(cible, args.repetitions, vide)
+        resultats[cible] = r
+        if "erreur" in r:
+            print(f"{cible}\n    ÉCHEC : {r['erreur']}")
+            continue
+        lourds = ", ".join(f"{m} {ms:.0f} ms" for m, ms in r["plus_lourds"])
+        print(f"{cible}\n    {r['median_s']*1000:7.0f} ms (min {r['min_s']*1000:.0f}) | {lourds}")
+
+    resultats["environnement"] = environnement()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            reference = json.load(f)
+        try:
+            alertes = comparer(resultats, reference, args.seuil)
+        except ValueError as e:
+            parser.exit(2, f"\n{e}\n")
+        print("\n" + ("\n".join(alertes) if alertes else "Aucune régression."))
+        sys.exit(1 if alertes else 0)
@@ -0,0 +1,255 @@
+import argparse
+import contextlib
+import functools
+import importlib.util
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from bench_demarrage import comparer, environnement
+
+# =============================================================================
+# BANC DE PERFORMANCE DES CHEMINS CRITIQUES
+# =============================================================================
+#
+#   primalite  : is_prime (cache vidé) et chaque backend de primalite.py, plus
+#                est_premier du laboratoire (division, jusqu'à 10^12), sur des
+#                entiers tirés autour de 10^6 … 10^15 ;
+#   crible     : generate_sg du laboratoire pour N croissant ;
+#   generateur : generate_sg_grammar_strict pour chaque combinaison de
+#                grammaires (G1 seul = mode TURBO), effectif recommandé par
+#                recommend_sg_max comme dans SGApp ; les compteurs
+#                StatsGenerateur du dernier passage sont joints au JSON ;
+#                sans G3, le mode sans_rejet est mesuré en plus. Une chaîne
+#                arrêtée au timeout dure --timeout quoi qu'il arrive : pour
+#                elle, la mesure comparée est le débit (tentatives par
+#                seconde), pas la durée ;
+#   analyse    : agrégat des explorateurs (ex-analyser_signatures) et
+#                analyser_G3 sur des tables synthétiques (1M lignes par défaut,
+#                --tailles 10000000 100000000 pour les grands volumes).
+# Résultats en JSON (même format que bench_demarrage.py) et comparaison à
+# une référence : une mesure plus lente de plus de --seuil est signalée.
+#
+# Référence versionnée : bench/reference_sg.json (bancs par défaut), propre
+# à la machine indiquée par sa clé "environnement" (x86_64, 1 processeur) ;
+# comparer refuse une référence d'une autre machine. Avant une
+# modification, enregistrer donc la sienne
+#   python bench_sg.py --json bench/reference_sg.json
+# puis, après la modification,
+#   python bench_sg.py --reference bench/reference_sg.json
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+REFERENCE = os.path.join(DOSSIER, "bench", "reference_sg.json")
+EXPOSANTS = (6, 9, 12, 15)
+EXPOSANT_MAX_DIVISION = 12
+TAILLES_CRIBLE = (10**5, 10**6, 10**7)
+TAILLES_TABLE = (1_000_000,)
+COMBINAISONS = [
+    ("G1 (TURBO)", (True, False, False)),
+    ("G2", (False, True, False)),
+    ("G3", (False, False, True)),
+    ("G1+G2", (True, True, False)),
+    ("G1+G3", (True, False, True)),
+    ("G2+G3", (False, True, True)),
+    ("G1+G2+G3", (True, True, True)),
+]
+
+
+@functools.lru_cache(maxsize=None)
+def _charger_script(nom):
+    """Module d'un script du dépôt (nom de fichier quelconque), sans son __main__."""
+    spec = importlib.util.spec_from_file_location("_banc_script", os.path.join(DOSSIER, nom))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def chronometrer(fonction, repetitions=3, preparer=None):
+    """{"median_s", "min_s"} de fonction() ; preparer() est appelé hors chrono."""
+    durees = []
+    for _ in range(repetitions):
+        if preparer:
+            preparer()
+        t0 = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - t0)
+    return {"median_s": statistics.median(durees), "min_s": min(durees)}
+
+
+def _echantillon(exposant, taille=1000, graine=0):
+    rng = random.Random(graine + exposant)
+    return [rng.randrange(10**exposant, 2 * 10**exposant) | 1 for _ in range(taille)]
+
+
+# ------------------------------------------------------------
+#  BANCS
+# ------------------------------------------------------------
+def banc_primalite(args):
+    import generateur_sg
+    from primalite import get_backend
+
+    labo = _charger_script("001_creation csvprototype_Laboratoire_Analyse_SG_Sophie_Germain.py")
+    res = {}
+    for e in EXPOSANTS:
+        nombres = _echantillon(e)
+        res[f"is_prime 10^{e}"] = chronometrer(
+            lambda: [generateur_sg.is_prime(n) for n in nombres], args.repetitions,
+            preparer=generateur_sg.prime_cache.clear)
+        for backend in ("miller_rabin", "bpsw"):
+            test = get_backend(backend)
+            res[f"{backend} 10^{e}"] = chronometrer(lambda: [test(n) for n in nombres], args.repetitions)
+        if e <= EXPOSANT_MAX_DIVISION:
+            res[f"est_premier 10^{e}"] = chronometrer(
+                lambda: [labo.est_premier(n) for n in nombres[:100]], args.repetitions)
+    return res
+
+
+def banc_crible(args):
+    labo = _charger_script("001_creation csvprototype_Laboratoire_Analyse_SG_Sophie_Germain.py")
+    res = {}
+    for n in args.crible:
+        nb = []
+        res[f"generate_sg {n:.0e}"] = chronometrer(lambda: nb.append(len(labo.generate_sg(n))), args.repetitions)
+        res[f"generate_sg {n:.0e}"]["sg"] = nb[-1]
+    return res
+
+
+def banc_generateur(args):
+    import generateur_sg
+
+    res = {}
+    for nom, (g1, g2, g3) in COMBINAISONS:
+        count = args.count or generateur_sg.recommend_sg_max(args.fin - args.debut, g2, g3)
+        # Sans G3, l'automate G1/G2 (sans_rejet) est mesuré à côté de la boucle de rejet
+        for sans_rejet in ((False, True) if not g3 else (False,)):
+            produits = []
+
+            def lancer():
+                stats = generateur_sg.StatsGenerateur()
+                sg, _ = generateur_sg.generate_sg_grammar_strict(
+                    args.debut, args.fin, count, random.Random(args.seed),
+                    use_g1=g1, use_g2=g2, use_g3=g3, timeout_seconds=args.timeout,
+                    stats=stats, sans_rejet=sans_rejet)
+                produits.append((len(sg), stats))
+            r = chronometrer(lancer, args.repetitions, preparer=generateur_sg.prime_cache.clear)
+            r["sg"], stats = produits[-1]  # < demandes : voir r["generateur"]["arret"]
+            r["demandes"] = count
+            if any(st.arret == "timeout" for _, st in produits):
+                # Durée = timeout, pas le calcul : on compare le débit
+                r["debit"] = statistics.median(st.tentatives / st.duree for _, st in produits)
+                r["unite_debit"] = "tentatives/s"
+            r["generateur"] = stats.as_dict()
+            res[f"grammaire {nom}" + (" sans rejet" if sans_rejet else "")] = r
+    return res
+
+
+def table_synthetique(lignes, graine=0):
+    """Table G3 plausible (Δ multiples de 6, familles 132/276/348) en colonnes numpy."""
+    import numpy as np
+    from stats_g3 import FAMILLES
+
+    rng = np.random.default_rng(graine)
+    delta = 6 * rng.geometric(1 / 30, lignes).astype(np.int64)
+    fam = np.array(FAMILLES, dtype=np.uint16)[rng.integers(0, 3, lignes + 1)]
+    p = 11 + np.concatenate([[0], np.cumsum(delta)[:-1]]).astype(np.uint64)
+    return {
+        "n": np.arange(lignes, dtype=np.int64), "p": p, "fam_p": fam[:-1],
+        "q": p + delta.astype(np.uint64), "fam_q": fam[1:], "delta": delta,
+        "G1": np.isin(delta, (6, 12, 18, 24)).astype(np.uint8),
+        "G2": np.isin(delta, (6, 12)).astype(np.uint8),
+        "G3": (~np.isin(delta, (6, 12, 18, 24))).astype(np.uint8),
+    }
+
+
+def banc_analyse(args):
+    import shutil
+
+    import pandas as pd
+    import chargeur_g3
+    from agregat_g3 import AgregatG3
+
+    os.environ["MPLBACKEND"] = "Agg"
+    analyse = _charger_script("Analyse_anomalies_G3_fichier.py")
+    import matplotlib.pyplot as plt
+    plt.show = lambda *a, **k: plt.close("all")
+
+    res = {}
+    with tempfile.TemporaryDirectory() as dossier:
+        # Cache du chargeur vidé avant chaque mesure : lecture CSV comprise
+        chargeur_g3.DOSSIER_CACHE = os.path.join(dossier, "cache")
+        vider_cache = lambda: shutil.rmtree(chargeur_g3.DOSSIER_CACHE, ignore_errors=True)
+        for lignes in args.tailles:
+            table = table_synthetique(lignes)
+            res[f"agregat {lignes:.0e}"] = chronometrer(
+                lambda: AgregatG3.depuis_colonnes(table["fam_p"], table["fam_q"], table["delta"]),
+                args.repetitions)
+
+            chemin = os.path.join(dossier, f"g3_{lignes}.csv")
+            pd.DataFrame(table).to_csv(chemin, index=False)
+            del table
+            with contextlib.redirect_stdout(io.StringIO()):
+                res[f"analyser_G3 {lignes:.0e}"] = chronometrer(
+                    lambda: analyse.analyser_G3(chemin), args.repetitions, preparer=vider_cache)
+            os.remove(chemin)
+    return res
+
+
+BANCS = {
+    "primalite": banc_primalite,
+    "crible": banc_crible,
+    "generateur": banc_generateur,
+    "analyse": banc_analyse,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc de performance : primalité, crible, générateur, analyse.")
+    parser.add_argument("bancs", nargs="*", default=list(BANCS), help=f"parmi : {', '.join(BANCS)}")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--crible", type=int, nargs="+", default=list(TAILLES_CRIBLE), help="bornes N de generate_sg")
+    parser.add_argument("--tailles", type=int, nargs="+", default=list(TAILLES_TABLE), help="lignes des tables synthétiques")
+    parser.add_argument("--debut", type=int, default=0, help="début de l'intervalle du générateur")
+    parser.add_argument("--fin", type=int, default=200_000, help="fin de l'intervalle du générateur")
+    parser.add_argument("--count", type=int, default=None, help="SG demandés (défaut : recommend_sg_max)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=5, help="timeout du générateur (s)")
+    parser.add_argument("--json", help="écrit les résultats dans ce fichier")
+    parser.add_argument("--reference", nargs="?", const=REFERENCE,
+                        help="résultats JSON précédents à comparer (sans valeur : bench/reference_sg.json)")
+    parser.add_argument("--seuil", type=float, default=0.2, help="tolérance relative (défaut 20 %%)")
+    args = parser.parse_args()
+    inconnus = set(args.bancs) - set(BANCS)
+    if inconnus:
+        parser.error(f"banc(s) inconnu(s) : {', '.join(sorted(inconnus))}")
+
+    sys.path.insert(0, DOSSIER)
+    resultats = {}
+    for nom in args.bancs:
+        print(f"=== {nom} ===", flush=True)
+        for mesure, r in BANCS[nom](args).items():
+            extra = f" | {r['sg']} SG" if "sg" in r else ""
+            extra += f" / {r['demandes']}" if "demandes" in r else ""
+            extra += f" ({r['generateur']['arret']})" if "generateur" in r else ""
+            extra += f" | {r['debit']:.0f} {r['unite_debit']}" if "debit" in r else ""
+            print(f"  {mesure:32} {r['median_s']*1000:10.1f} ms (min {r['min_s']*1000:.1f}){extra}", flush=True)
+            resultats[f"{nom}/{mesure}"] = r
+
+    resultats["environnement"] = environnement()
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultats, f, indent=2, ensure_ascii=False)
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as f:
+            reference = json.load(f)
+        try:
+            alertes = comparer(resultats, reference, args.seuil)
+        except ValueError as e:
+            parser.exit(2, f"\n{e}\n")
+        print("\n" + ("\n".join(alertes) if alertes else "Aucune régression."))
+        sys.exit(1 if alertes else 0)
@@ -0,0 +1,251 @@
+import csv
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from format_g3 import lire_g3_npz
+
+# =============================================================================
+# CHARGEUR PARTAGÉ DES TABLES G3
+# =============================================================================
+#
+# Remplace les pd.read_csv(sep=None, engine='python') de chaque script :
+#   - schéma déclaré (dtypes, usecols) et parseur C ou pyarrow ;
+#   - séparateur détecté sur la seule ligne d'en-tête ;
+#   - lecture par blocs (chunksize) pour les fichiers trop gros ;
+#   - copie parsée mise en cache (.npz non compressé), clé = chemin,
+#     invalidée si mtime/taille changent ET que le contenu (sha1) diffère ;
+#     si le fichier a seulement grandi (mêmes premiers octets, ajout de
+#     lignes complètes), seuls les octets ajoutés sont parsés et ajoutés
+#     à la copie en cache.
+
+SCHEMA_G3 = {
+    "n": np.int64,
+    "p": np.uint64,
+    "fam_p": np.uint16,
+    "q": np.uint64,
+    "fam_q": np.uint16,
+    "delta": np.int64,
+    "G1": np.uint8,
+    "G2": np.uint8,
+    "G3": np.uint8,
+}
+
+# Familles inconnues ("?") : lues comme valeurs manquantes d'un UInt16
+# nullable, puis rendues comme format_g3 (uint16, ou object avec "?")
+FAMILLES_G3 = ("fam_p", "fam_q")
+FAM_INCONNUE = "?"
+
+DOSSIER_CACHE = os.environ.get(
+    "SG_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "sg_g3"))
+
+try:
+    import pyarrow  # noqa: F401
+    MOTEUR_CSV = "pyarrow"
+except ImportError:
+    MOTEUR_CSV = "c"
+
+
+def _entete(chemin):
+    """(séparateur, noms de colonnes nettoyés) à partir de la première ligne."""
+    with open(chemin, newline="") as f:
+        ligne = f.readline()
+    try:
+        sep = csv.Sniffer().sniff(ligne, delimiters=",;\t ").delimiter
+    except csv.Error:
+        sep = ","
+    if sep == " ":
+        sep = r"\s+"
+    noms = [c.strip() for c in (ligne.split() if sep == r"\s+" else ligne.rstrip("\r\n").split(sep))]
+    return sep, noms
+
+
+def _familles(df):
+    """fam_p / fam_q lues en UInt16 nullable -> uint16, ou object avec "?" (comme lire_g3_npz)."""
+    for c in FAMILLES_G3:
+        if c in df.columns:
+            col = df[c]
+            if col.isna().any():
+                df[c] = col.astype(object).where(col.notna(), FAM_INCONNUE)
+            else:
+                df[c] = col.to_numpy(dtype=SCHEMA_G3[c])
+    return df
+
+
+def _colonne_cache(df, c):
+    """Colonne pour le .npz du cache : "?" codé 0 (aucune famille ne vaut 0), sans pickle."""
+    col = df[c]
+    if c in FAMILLES_G3 and col.dtype == object:
+        return np.where(col == FAM_INCONNUE, 0, col).astype(SCHEMA_G3[c])
+    return col.to_numpy()
+
+
+def _colonne_depuis_cache(c, valeurs):
+    if c in FAMILLES_G3 and (valeurs == 0).any():
+        fam = valeurs.astype(object)
+        fam[valeurs == 0] = FAM_INCONNUE
+        return fam
+    return valeurs
+
+
+def _lire_csv(chemin, usecols=None, chunksize=None, debut=None, fin=None):
+    """Table CSV, ou seulement les lignes des octets [debut, fin[ (sans en-tête) si debut est donné."""
+    sep, noms = _entete(chemin)
+    source, entete = chemin, 0
+    if debut is not None:
+        with open(chemin, "rb") as f:
+            f.seek(debut)
+            source, entete = io.BytesIO(f.read(fin - debut)), None
+    dtype = {c: ("UInt16" if c in FAMILLES_G3 else SCHEMA_G3[c]) for c in noms if c in SCHEMA_G3}
+    moteur = MOTEUR_CSV
+    if chunksize is not None or sep == r"\s+":
+        moteur = "c"  # pyarrow : ni lecture par blocs ni séparateur regex
+    lecture = pd.read_csv(source, sep=sep, header=entete, names=noms, dtype=dtype, usecols=usecols,
+                          chunksize=chunksize, engine=moteur, na_values={c: [FAM_INCONNUE] for c in FAMILLES_G3},
+                          keep_default_na=False)
+    if chunksize is None:
+        return _familles(lecture)
+    return (_familles(bloc) for bloc in lecture)
+
+
+def _sha1(chemin, taille=None):
+    """sha1 du fichier, ou de ses taille premiers octets."""
+    h = hashlib.sha1()
+    reste = float("inf") if taille is None else taille
+    with open(chemin, "rb") as f:
+        while reste > 0:
+            bloc = f.read(int(min(1 << 20, reste)))
+            if not bloc:
+                break
+            h.update(bloc)
+            reste -= len(bloc)
+    return h.hexdigest()
+
+
+def empreinte(chemin):
+    """{"mtime_ns", "taille", "sha1"} du fichier : clé de validité des caches dérivés."""
+    st = os.stat(chemin)
+    return {"mtime_ns": st.st_mtime_ns, "taille": st.st_size, "sha1": _sha1(chemin)}
+
+
+def commence_par(chemin, emp):
+    """True si le fichier est celui de l'empreinte emp, tel quel ou prolongé par ajout en fin."""
+    st = os.stat(chemin)
+    if (st.st_mtime_ns, st.st_size) == (emp["mtime_ns"], emp["taille"]):
+        return True
+    return st.st_size >= emp["taille"] and _sha1(chemin, emp["taille"]) == emp["sha1"]
+
+
+def _chemins_cache(chemin):
+    cle = hashlib.sha1(os.path.abspath(chemin).encode()).hexdigest()
+    base = os.path.join(DOSSIER_CACHE, cle)
+    return base + ".npz", base + ".json"
+
+
+def _lire_cache(chemin):
+    """DataFrame du cache, ou None si absent, périmé ou illisible (tronqué, corrompu…)."""
+    f_npz, f_meta = _chemins_cache(chemin)
+    if not (os.path.exists(f_npz) and os.path.exists(f_meta)):
+        return None
+    try:
+        with open(f_meta) as f:
+            meta = json.load(f)
+        st = os.stat(chemin)
+        if st.st_size > meta["taille"]:
+            return _prolonger_cache(chemin, meta, f_npz, st.st_size)
+        if (meta["mtime_ns"], meta["taille"]) != (st.st_mtime_ns, st.st_size):
+            # Fichier touché ou recopié : on ne réutilise que si le contenu est identique
+            if meta["taille"] != st.st_size or meta["sha1"] != _sha1(chemin):
+                return None
+            meta["mtime_ns"] = st.st_mtime_ns
+            try:
+                _ecrire_atomique(f_meta, lambda f: json.dump(meta, f), mode="w")
+            except OSError:
+                pass
+        return _df_cache(f_npz, meta)
+    except Exception:
+        return None  # cache défectueux : relu depuis la source puis réécrit
+
+
+def _df_cache(f_npz, meta):
+    with np.load(f_npz) as z:
+        return pd.DataFrame({c: _colonne_depuis_cache(c, z[c]) for c in meta["colonnes"]})
+
+
+def _prolonger_cache(chemin, meta, f_npz, taille):
+    """
+    Fichier agrandi : si ses meta["taille"] premiers octets sont ceux mis en
+    cache et se terminent par une fin de ligne, seules les lignes ajoutées
+    sont parsées. Retourne le DataFrame complet (cache réécrit), ou None.
+    """
+    with open(chemin, "rb") as f:
+        f.seek(meta["taille"] - 1)
+        if f.read(1) != b"\n":
+            return None
+    if _sha1(chemin, meta["taille"]) != meta["sha1"]:
+        return None
+    ajout = _lire_csv(chemin, debut=meta["taille"], fin=taille)
+    df = pd.concat([_df_cache(f_npz, meta), ajout[meta["colonnes"]]], ignore_index=True)
+    try:
+        _ecrire_cache(chemin, df, taille)
+    except OSError:
+        pass
+    return df
+
+
+def _ecrire_atomique(destination, ecrire, mode="wb"):
+    """ecrire(f) dans un fichier temporaire voisin, puis os.replace : jamais de fichier à moitié écrit."""
+    tmp = f"{destination}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, mode) as f:
+            ecrire(f)
+        os.replace(tmp, destination)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _ecrire_cache(chemin, df, taille=None):
+    """Met df en cache ; taille : nombre d'octets du fichier effectivement parsés (défaut : tout)."""
+    os.makedirs(DOSSIER_CACHE, exist_ok=True)
+    f_npz, f_meta = _chemins_cache(chemin)
+    meta = dict(empreinte(chemin), colonnes=list(df.columns))
+    if taille is not None and taille != meta["taille"]:
+        # Le fichier a encore grandi depuis la lecture : empreinte des octets lus
+        meta.update(taille=taille, sha1=_sha1(chemin, taille))
+    # Méta en dernier : tant qu'elle n'est pas remplacée, l'ancienne empreinte
+    # ne correspond plus au fichier et le cache est ignoré
+    _ecrire_atomique(f_npz, lambda f: np.savez(f, **{c: _colonne_cache(df, c) for c in df.columns}))
+    _ecrire_atomique(f_meta, lambda f: json.dump(meta, f), mode="w")
+
+
+def charger_g3(chemin, usecols=None, chunksize=None, cache=True):
+    """
+    Charge une table G3 (.csv ou .npz) en DataFrame typé.
+    Avec chunksize, retourne un itérateur de DataFrames (CSV uniquement,
+    sans cache). usecols restreint les colonnes lues.
+    """
+    if chemin.endswith(".npz"):
+        colonnes = lire_g3_npz(chemin)
+        if usecols is not None:
+            colonnes = {c: colonnes[c] for c in usecols}
+        return pd.DataFrame(colonnes)
+
+    if chunksize is not None:
+        return _lire_csv(chemin, usecols=usecols, chunksize=chunksize)
+
+    df = _lire_cache(chemin) if cache else None
+    if df is None:
+        df = _lire_csv(chemin)
+        if cache:
+            try:
+                _ecrire_cache(chemin, df)
+            except OSError:
+                pass  # cache facultatif (disque plein, dossier en lecture seule…)
+    if usecols is not None:
+        df = df[list(usecols)]
+    return df
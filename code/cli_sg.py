@@ -0,0 +1,243 @@
+import argparse
+import csv
+import random
+import sys
+import time
+
+from generateur_sg import (
+    METHODES_HASARD, StatsGenerateur, debut_corrige_348, generate_random_model,
+    generate_safe_primes_grammar, generate_sg_grammar_strict,
+)
+from grammaire import Grammaire
+from primalite import BACKENDS, BACKEND_DEFAUT
+
+# =============================================================================
+# INTERFACE EN LIGNE DE COMMANDE (SANS AFFICHAGE)
+# =============================================================================
+#
+# Mêmes générateurs que SGApp, sans tkinter ni matplotlib :
+#   generate-sg      chaîne grammaticale  -> colonnes SG, k
+#   generate-safe    safe primes q = 2p+1 -> colonnes q, p
+#   generate-random  modèle hasard        -> colonnes SG, k
+#   compare          grammaire vs hasard (même effectif) -> résumé + colonnes
+#   index            crible [start, end] dans l'index persistant (index_sg.py) :
+#                    générateurs, modèle hasard et pipeline relisent ensuite
+#                    ces tranches au lieu de recribler
+#
+# Colonnes CSV (cases vides en fin de colonne plus courte) ou .npz (uint64) :
+# SG est la chaîne p_0 < p_1 < …, k l'écart p_i+1 = p_i + 30·k_i (une valeur
+# de moins que SG). Ce ne sont pas des tables G3 : une chaîne grammaticale
+# ne relie que des SG de l'angle 348°, ses Δ = 30k ne se classent pas en
+# G1/G2/G3 (pipeline_g3.py produit les tables G3 des SG consécutifs).
+#
+# Exemple (cron) :
+#   python cli_sg.py generate-sg --start 1000000 --end 2000000 --count 500 \
+#       --seed 42 --sortie chaine.npz
+#
+# --stats affiche les compteurs du générateur (StatsGenerateur) et --profil
+# écrit un dump cProfile : de quoi voir pourquoi une configuration atteint
+# le timeout.
+
+
+def _ecrire_colonnes(chemin, colonnes):
+    """Colonnes de longueurs éventuellement différentes -> CSV (cases vides) ou .npz (uint64)."""
+    if chemin.endswith(".npz"):
+        import numpy as np
+        for nom, v in colonnes.items():
+            if len(v) and (min(v) < 0 or max(v) >= 1 << 64):
+                raise ValueError(f"Colonne {nom} hors de uint64 : utiliser une sortie .csv")
+        np.savez_compressed(chemin, **{nom: np.asarray(v, dtype=np.uint64) for nom, v in colonnes.items()})
+        return
+    hauteur = max((len(v) for v in colonnes.values()), default=0)
+    with open(chemin, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(colonnes.keys())
+        for i in range(hauteur):
+            writer.writerow([v[i] if i < len(v) else "" for v in colonnes.values()])
+
+
+def _ecrire_chaine(chemin, sg, gaps):
+    _ecrire_colonnes(chemin, {"SG": sg, "k": gaps})
+    print(f"{len(sg)} SG écrits dans {chemin}", file=sys.stderr)
+
+
+def _options_generateur(args):
+    grammaire = Grammaire.depuis_json(args.grammaire) if args.grammaire else None
+    return dict(use_g1=not args.sans_g1, use_g2=not args.sans_g2, use_g3=not args.sans_g3,
+                timeout_seconds=args.timeout, backend=args.backend, grammaire=grammaire,
+                sans_rejet=args.sans_rejet, crible=args.crible)
+
+
+def _instrumentation(args):
+    """Options stats / profil du générateur (--stats, --profil), hors mode --workers."""
+    return dict(stats=StatsGenerateur() if args.stats else None, profil=args.profil)
+
+
+def _bilan(instrumentation):
+    if instrumentation["stats"] is not None:
+        print(instrumentation["stats"].resume(), file=sys.stderr)
+    if instrumentation["profil"]:
+        print(f"Profil cProfile écrit dans {instrumentation['profil']}", file=sys.stderr)
+
+
+def _suivi(args):
+    """time_callback affichant l'avancement sur stderr (--progression)."""
+    if not args.progression:
+        return None
+
+    def afficher(elapsed, remaining):
+        print(f"  {elapsed:.1f} s écoulées, reste estimé {remaining:.1f} s", file=sys.stderr, flush=True)
+    return afficher
+
+
+def _generer_chaine(args):
+    options = _options_generateur(args)
+    if args.workers and args.workers > 1:
+        from generation_parallele import generate_sg_shards
+        sg, gaps, stats = generate_sg_shards(args.start, args.end, args.count,
+                                             seed=args.seed, workers=args.workers, **options)
+        if args.stats:
+            for st in stats:
+                print(f"Tranche {st['shard']} : {st['generateur']['arret']}, "
+                      f"{st['generes']}/{st['demandes']} SG", file=sys.stderr)
+        return sg, gaps
+    instrumentation = _instrumentation(args)
+    resultat = generate_sg_grammar_strict(args.start, args.end, args.count, random.Random(args.seed),
+                                          time_callback=_suivi(args), **options, **instrumentation)
+    _bilan(instrumentation)
+    return resultat
+
+
+def _avertir(obtenus, demandes, quoi):
+    if obtenus < demandes:
+        print(f"Attention : {obtenus}/{demandes} {quoi} (timeout ou intervalle épuisé)", file=sys.stderr)
+
+
+def _moyenne(xs):
+    return sum(xs) / len(xs) if xs else float("nan")
+
+
+# ------------------------------------------------------------
+#  SOUS-COMMANDES
+# ------------------------------------------------------------
+def cmd_generate_sg(args):
+    sg, gaps = _generer_chaine(args)
+    _avertir(len(sg), args.count, "SG générés")
+    _ecrire_chaine(args.sortie, sg, gaps)
+
+
+def cmd_generate_safe(args):
+    options = _options_generateur(args)
+    instrumentation = _instrumentation(args)
+    safe_q, safe_p = generate_safe_primes_grammar(args.start, args.end, args.count, random.Random(args.seed),
+                                                  time_callback=_suivi(args), **options, **instrumentation)
+    _bilan(instrumentation)
+    _avertir(len(safe_q), args.count, "safe primes")
+    _ecrire_colonnes(args.sortie, {"safe_prime_q": safe_q, "safe_prime_p": safe_p})
+
+
+def cmd_generate_random(args):
+    sg, gaps = generate_random_model(args.start, args.end, args.count, random.Random(args.seed),
+                                     backend=args.backend, methode=args.methode)
+    _avertir(len(sg), args.count, "SG tirés")
+    _ecrire_chaine(args.sortie, sg, gaps)
+
+
+def cmd_compare(args):
+    t0 = time.time()
+    sg_g, gaps_g = _generer_chaine(args)
+    # Graine distincte pour que le hasard ne rejoue pas les tirages de la grammaire
+    sg_r, gaps_r = generate_random_model(args.start, args.end, len(sg_g), random.Random(args.seed + 1),
+                                         backend=args.backend, methode=args.methode)
+    print(f"Début corrigé 348° : {debut_corrige_348(args.start)} | Fin : {args.end}")
+    print(f"SG grammaire : {len(sg_g)} | moyenne des écarts k : {_moyenne(gaps_g):.3f}")
+    print(f"SG hasard    : {len(sg_r)} | moyenne des écarts k : {_moyenne(gaps_r):.3f}")
+    print(f"Communs      : {len(set(sg_g) & set(sg_r))} | durée : {time.time() - t0:.2f} s")
+    if args.sortie:
+        _ecrire_colonnes(args.sortie, {"SG_grammar": sg_g, "gap_grammar": gaps_g,
+                                       "SG_random": sg_r, "gap_random": gaps_r})
+
+
+def cmd_index(args):
+    from index_sg import DOSSIER_DEFAUT, ENTIERS_PAR_TRANCHE, IndexSG
+
+    index = IndexSG(args.dossier or DOSSIER_DEFAUT, calculer=True)
+    t0 = time.time()
+
+    def afficher(t, faites, a_faire):
+        print(f"  tranche {t} [{t * ENTIERS_PAR_TRANCHE}, {(t + 1) * ENTIERS_PAR_TRANCHE - 1}] "
+              f"{faites}/{a_faire} ({time.time() - t0:.1f} s)", file=sys.stderr, flush=True)
+    nb = index.assurer(args.start, args.end, rappel=afficher)
+    print(f"{nb} tranche(s) calculée(s) dans {index.dossier}, [{args.start}, {args.end}] couvert")
+
+
+def construire_parser():
+    parser = argparse.ArgumentParser(description="Générateur SG (grammaire, safe primes, hasard) sans interface graphique.")
+    sous = parser.add_subparsers(dest="commande", required=True)
+
+    def commun(p, sortie_requise=True):
+        p.add_argument("--start", type=int, required=True, help="début de l'intervalle")
+        p.add_argument("--end", type=int, required=True, help="fin de l'intervalle")
+        p.add_argument("--count", type=int, required=True, help="nombre d'éléments demandés")
+        p.add_argument("--seed", type=int, default=0, help="graine (résultats reproductibles)")
+        p.add_argument("--backend", choices=sorted(BACKENDS), default=BACKEND_DEFAUT, help="test de primalité")
+        p.add_argument("--sortie", required=sortie_requise, help="fichier .csv ou .npz")
+
+    def hasard(p):
+        p.add_argument("--methode", choices=METHODES_HASARD, default="auto",
+                       help="moteur du modèle hasard (crible, réservoir ou tirages)")
+
+    def grammaire(p):
+        p.add_argument("--sans-g1", action="store_true", help="désactive G1 (k tirés dans 1..40)")
+        p.add_argument("--sans-g2", action="store_true", help="désactive les motifs internes G2")
+        p.add_argument("--sans-g3", action="store_true", help="désactive les anomalies G3")
+        p.add_argument("--grammaire", metavar="FICHIER", help="grammaire JSON (voir Grammaire.depuis_dict)")
+        p.add_argument("--sans-rejet", action="store_true",
+                       help="sans G3 : pas tirés dans l'automate G1/G2 (même loi, autre flux aléatoire)")
+        p.add_argument("--crible", action="store_true",
+                       help="SG de l'intervalle criblés d'avance s'il est assez étroit et bas, tests par consultation (même résultat)")
+        p.add_argument("--timeout", type=float, default=120, help="durée maximale en secondes")
+        p.add_argument("--progression", action="store_true", help="avancement sur stderr")
+        p.add_argument("--stats", action="store_true",
+                       help="bilan du générateur sur stderr (rejets, acceptations, temps is_sg)")
+        p.add_argument("--profil", metavar="FICHIER", help="dump cProfile de la génération (pstats)")
+
+    p = sous.add_parser("generate-sg", help="chaîne SG grammaticale (colonnes SG, k)")
+    commun(p); grammaire(p)
+    p.add_argument("--workers", type=int, default=None, help="processus (tranches parallèles)")
+    p.set_defaults(func=cmd_generate_sg)
+
+    p = sous.add_parser("generate-safe", help="safe primes issus de la chaîne grammaticale")
+    commun(p); grammaire(p)
+    p.set_defaults(func=cmd_generate_safe)
+
+    p = sous.add_parser("generate-random", help="modèle hasard, SG de l'angle 348° (colonnes SG, k)")
+    commun(p); hasard(p)
+    p.set_defaults(func=cmd_generate_random)
+
+    p = sous.add_parser("compare", help="grammaire vs hasard sur le même effectif")
+    commun(p, sortie_requise=False); grammaire(p); hasard(p)
+    p.add_argument("--workers", type=int, default=None, help="processus (tranches parallèles)")
+    p.set_defaults(func=cmd_compare)
+
+    p = sous.add_parser("index", help="calcule les tranches manquantes de l'index SG persistant")
+    p.add_argument("--start", type=int, required=True, help="début de l'intervalle")
+    p.add_argument("--end", type=int, required=True, help="fin de l'intervalle")
+    p.add_argument("--dossier", default=None, help="dossier de l'index (défaut : SG_INDEX_DIR ou data/index_sg)")
+    p.set_defaults(func=cmd_index)
+    return parser
+
+
+def main(argv=None):
+    parser = construire_parser()
+    args = parser.parse_args(argv)
+    if args.start >= args.end:
+        parser.error("--start doit être < --end")
+    try:
+        args.func(args)
+    except ValueError as e:
+        parser.exit(1, f"Erreur : {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import math
+from itertools import compress
+
+# =============================================================================
+# CRIBLE SEGMENTÉ DES NOMBRES DE SOPHIE GERMAIN
+# =============================================================================
+#
+# Un seul tableau d'octets par segment, indexé par les p impairs, est criblé
+# deux fois par chaque petit premier r :
+#   - p ≡ 0 (mod r)              -> p composé (sauf p = r)
+#   - p ≡ (r - 1) / 2 (mod r)    -> 2p + 1 divisible par r (sauf 2p + 1 = r)
+# Ce qui reste à 1 est exactement l'ensemble des SG du segment.
+
+# 2^18 octets par segment : tient dans un cache L2 usuel (256 Ko)
+TAILLE_SEGMENT = 1 << 18
+
+
+def petits_premiers(limite):
+    """Liste des premiers <= limite (crible d'Ératosthène simple)."""
+    if limite < 2:
+        return []
+    crible = bytearray(b"\x01") * (limite + 1)
+    crible[0] = crible[1] = 0
+    for i in range(2, math.isqrt(limite) + 1):
+        if crible[i]:
+            crible[i*i::i] = bytes(len(range(i*i, limite + 1, i)))
+    return [i for i in range(limite + 1) if crible[i]]
+
+
+def _premier_multiple(seg_lo, residu, r):
+    """Plus petit p impair >= seg_lo tel que p ≡ residu (mod r)."""
+    m = seg_lo + (residu - seg_lo) % r
+    if m % 2 == 0:
+        m += r
+    return m
+
+
+def iter_sg(lo, hi, taille_segment=TAILLE_SEGMENT):
+    """Itère, en ordre croissant, les SG p de l'intervalle [lo, hi]."""
+    if hi < 2 or lo > hi:
+        return
+    if lo <= 2:
+        yield 2
+
+    base = petits_premiers(math.isqrt(2*hi + 1))[1:]  # premiers impairs
+    debut = max(lo, 3) | 1
+    pas = 2 * taille_segment
+
+    for seg_lo in range(debut, hi + 1, pas):
+        seg_hi = min(seg_lo + pas - 2, hi)
+        n = (seg_hi - seg_lo) // 2 + 1
+        seg = bytearray(b"\x01") * n
+        borne_q = 2*seg_hi + 1
+
+        for r in base:
+            if r * r > borne_q:
+                break
+            # p divisible par r
+            m = _premier_multiple(seg_lo, 0, r)
+            if m == r:
+                m += 2*r
+            if m <= seg_hi:
+                i = (m - seg_lo) // 2
+                seg[i::r] = bytes(len(range(i, n, r)))
+            # 2p + 1 divisible par r
+            a = (r - 1) // 2
+            m = _premier_multiple(seg_lo, a, r)
+            if m == a:
+                m += 2*r
+            if m <= seg_hi:
+                i = (m - seg_lo) // 2
+                seg[i::r] = bytes(len(range(i, n, r)))
+
+        yield from compress(range(seg_lo, seg_hi + 1, 2), seg)
+
+
+def liste_sg(lo, hi, taille_segment=TAILLE_SEGMENT):
+    """Liste des SG de [lo, hi] (voir iter_sg)."""
+    return list(iter_sg(lo, hi, taille_segment))
@@ -0,0 +1,172 @@
+import os
+import tempfile
+import zipfile
+from itertools import islice
+
+import numpy as np
+
+# =============================================================================
+# FORMAT COLONNAIRE BINAIRE DES TABLES G3 (.npz)
+# =============================================================================
+#
+# Une table G3 (n, p, fam_p, q, fam_q, delta, G1, G2, G3) est entièrement
+# déterminée par la suite des SG : on stocke donc
+#   - p0         : premier p (uint64)
+#   - delta      : q - p par ligne (uint32) ; p est reconstruit par somme
+#                  cumulée (encodage delta), q = p + delta
+#   - fam_p/fam_q: énumération uint8 (0=132, 1=276, 2=348, 255=?)
+#   - g          : champ de bits uint8 (bit 0 = G1, bit 1 = G2, bit 2 = G3)
+# soit 7 octets par ligne contre ~40 en CSV. Les lignes doivent être
+# chaînées (q_i = p_i+1), ce que l'écriture vérifie.
+
+FAMILLES = (132, 276, 348)
+FAM_INCONNUE = 255
+_CODE_FAMILLE = {str(f): i for i, f in enumerate(FAMILLES)}
+_CODE_FAMILLE.update({f: i for i, f in enumerate(FAMILLES)})
+_FAM_DECODE = np.zeros(256, dtype=np.uint16)
+_FAM_DECODE[:len(FAMILLES)] = FAMILLES
+
+BIT_G1, BIT_G2, BIT_G3 = 1, 2, 4
+VERSION_FORMAT = 1
+TAILLE_BLOC = 1_000_000
+COLONNES_NPZ = (("delta", np.uint32), ("fam_p", np.uint8), ("fam_q", np.uint8), ("g", np.uint8))
+
+
+def code_famille(fam):
+    return _CODE_FAMILLE.get(fam, FAM_INCONNUE)
+
+
+def _membre_npy(zf, nom, dtype, n, source=None):
+    """Écrit nom.npy dans l'archive : en-tête (n,) puis les octets de source (fichier brut)."""
+    with zf.open(f"{nom}.npy", "w", force_zip64=True) as f:
+        np.lib.format.write_array_header_1_0(
+            f, {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                "fortran_order": False, "shape": (n,)})
+        if source is not None:
+            with open(source, "rb") as brut:
+                for morceau in iter(lambda: brut.read(1 << 20), b""):
+                    f.write(morceau)
+
+
+def _scalaire_npy(zf, nom, valeur):
+    with zf.open(f"{nom}.npy", "w") as f:
+        np.lib.format.write_array(f, np.asarray(valeur))
+
+
+def ecrire_g3_npz(chemin, lignes, taille_bloc=TAILLE_BLOC):
+    """
+    Écrit des lignes G3 (tuples dans l'ordre des colonnes G3) au format
+    colonnaire, en mémoire constante : chaque bloc est converti puis ajouté
+    à un fichier brut par colonne, et l'archive est assemblée à la fin.
+    Retourne le nombre de lignes écrites.
+    """
+    dossier = os.path.dirname(os.path.abspath(chemin))
+    with tempfile.TemporaryDirectory(dir=dossier, prefix=".g3npz_") as tmp:
+        bruts = {nom: os.path.join(tmp, nom) for nom, _ in COLONNES_NPZ}
+        fichiers = {nom: open(b, "wb") for nom, b in bruts.items()}
+        it = iter(lignes)
+        p0, q_prec, n = None, None, 0
+        try:
+            while True:
+                bloc = list(islice(it, taille_bloc))
+                if not bloc:
+                    break
+                p = np.fromiter((l[1] for l in bloc), dtype=np.uint64, count=len(bloc))
+                q = np.fromiter((l[3] for l in bloc), dtype=np.uint64, count=len(bloc))
+                d = np.fromiter((l[5] for l in bloc), dtype=np.int64, count=len(bloc))
+                if p0 is None:
+                    p0 = int(p[0])
+                _verifier_chaine(p, q, d, q_prec, n)
+                q_prec = int(q[-1])
+                colonnes = {
+                    "delta": d.astype(np.uint32),
+                    "fam_p": np.fromiter((code_famille(l[2]) for l in bloc), dtype=np.uint8, count=len(bloc)),
+                    "fam_q": np.fromiter((code_famille(l[4]) for l in bloc), dtype=np.uint8, count=len(bloc)),
+                    "g": np.fromiter((l[6] * BIT_G1 | l[7] * BIT_G2 | l[8] * BIT_G3 for l in bloc),
+                                     dtype=np.uint8, count=len(bloc)),
+                }
+                for nom, valeurs in colonnes.items():
+                    fichiers[nom].write(valeurs.tobytes())
+                n += len(bloc)
+        finally:
+            for f in fichiers.values():
+                f.close()
+
+        archive = os.path.join(tmp, "table.npz")
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            _scalaire_npy(zf, "version", np.uint8(VERSION_FORMAT))
+            _scalaire_npy(zf, "p0", np.uint64(p0 or 0))
+            for nom, dtype in COLONNES_NPZ:
+                _membre_npy(zf, nom, dtype, n, bruts[nom])
+        os.replace(archive, chemin)
+    return n
+
+
+def _verifier_chaine(p, q, d, q_prec, debut):
+    """Lève ValueError si une ligne rompt la chaîne (q = p + Δ, p_i+1 = q_i) ou si Δ dépasse 32 bits."""
+    erreurs = []
+    if (d < 0).any() or (d >= 1 << 32).any():
+        erreurs.append(np.flatnonzero((d < 0) | (d >= 1 << 32))[0])
+    if (q - p != d.astype(np.uint64)).any():
+        erreurs.append(np.flatnonzero(q - p != d.astype(np.uint64))[0])
+    if len(p) > 1 and (p[1:] != q[:-1]).any():
+        erreurs.append(np.flatnonzero(p[1:] != q[:-1])[0] + 1)
+    if q_prec is not None and int(p[0]) != q_prec:
+        erreurs.append(0)
+    if erreurs:
+        i = int(min(erreurs))
+        raise ValueError(f"Ligne {debut + i} non chaînée ou Δ hors uint32 "
+                         f"(p={int(p[i])}, q={int(q[i])}, Δ={int(d[i])}) : "
+                         "le format .npz exige q = p + Δ et p suivant = q précédent")
+
+
+def lire_g3_npz(chemin):
+    """Relit une table G3 colonnaire ; retourne un dict de tableaux NumPy."""
+    with np.load(chemin) as z:
+        delta = z["delta"].astype(np.int64)  # même dtype que le chemin CSV (SCHEMA_G3)
+        p0 = np.uint64(z["p0"])
+        fam_p, fam_q, g = z["fam_p"], z["fam_q"], z["g"]
+
+    p = np.empty(len(delta), dtype=np.uint64)
+    if len(delta):
+        p[0] = p0
+        np.cumsum(delta[:-1], dtype=np.uint64, out=p[1:])
+        p[1:] += p0
+    return {
+        "n": np.arange(len(delta), dtype=np.int64),
+        "p": p,
+        "fam_p": _decoder_familles(fam_p),
+        "q": p + delta.astype(np.uint64),
+        "fam_q": _decoder_familles(fam_q),
+        "delta": delta,
+        "G1": (g & BIT_G1).astype(np.uint8),
+        "G2": ((g & BIT_G2) >> 1).astype(np.uint8),
+        "G3": ((g & BIT_G3) >> 2).astype(np.uint8),
+    }
+
+
+def _decoder_familles(codes):
+    """132/276/348 (uint16) ; tableau object avec "?" si une famille est inconnue."""
+    fam = _FAM_DECODE[codes]
+    inconnues = codes == FAM_INCONNUE
+    if inconnues.any():
+        fam = fam.astype(object)
+        fam[inconnues] = "?"
+    return fam
+
+
+def lire_g3_dataframe(chemin):
+    """Table G3 colonnaire sous forme de DataFrame pandas (mêmes colonnes que le CSV)."""
+    import pandas as pd
+    return pd.DataFrame(lire_g3_npz(chemin))
+
+
+def convertir_csv_en_npz(chemin_csv, chemin_npz):
+    """Convertit une table G3 CSV existante au format colonnaire."""
+    import csv
+    with open(chemin_csv, newline="") as f:
+        lecteur = csv.reader(f)
+        next(lecteur)
+        lignes = ((int(n), int(p), fp, int(q), fq, int(d), int(g1), int(g2), int(g3))
+                  for n, p, fp, q, fq, d, g1, g2, g3 in lecteur)
+        return ecrire_g3_npz(chemin_npz, lignes)
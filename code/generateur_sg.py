@@ -0,0 +1,561 @@
+import functools
+import math
+import random
+import time
+from collections import Counter
+
+from crible_sg import TAILLE_SEGMENT, iter_sg
+from grammaire import GRAMMAIRE_DEFAUT
+from index_sg import ouvrir_index
+from primalite import CachePrimalite, get_backend
+from roue_sg import ROUE_BORNE_DEFAUT, RoueResidus
+
+# ============================
+#  FILTRE ANGULAIRE
+# ============================
+
+ANGLE_348_RESIDU = 29  # résidu modulo 30 pour l’angle 348°
+
+def is_angle_348(n):
+    return n % 30 == ANGLE_348_RESIDU
+
+def debut_corrige_348(start):
+    """Plus petit entier >= start dans l’angle 348°."""
+    n = start
+    while not is_angle_348(n):
+        n += 1
+    return n
+
+# ============================
+#  CACHE DE PRIMALITÉ
+# ============================
+
+# Cache borné (64 Mo par défaut : positifs compacts + LRU des composés) ;
+# prime_cache.configurer(...) pour l'ajuster
+prime_cache = CachePrimalite()
+
+def is_prime(n, backend=None):
+    """Test de primalité mis en cache ; backend : voir primalite.BACKENDS."""
+    return prime_cache.test(n, get_backend(backend))
+
+# Index SG persistant (lecture seule) : consulté avant toute arithmétique
+index_sg = ouvrir_index()
+
+def is_sg(n, backend=None):
+    connu = index_sg.consulter(n)
+    if connu is not None:
+        return connu
+    return is_prime(n, backend) and is_prime(2*n + 1, backend)
+
+# ============================
+#  INSTRUMENTATION
+# ============================
+
+class StatsGenerateur:
+    """
+    Compteurs d'un appel à generate_sg_grammar_strict (paramètre stats=) :
+    tirages / acceptations par source (G1, hasard, G3_A, G3_B, G3_C), rejets
+    par filtre, appels is_sg et temps passé dedans, activité du cache de
+    primalité pendant l'appel, et raison de l'arrêt.
+    """
+
+    def __init__(self):
+        self.tentatives = 0
+        self.tirages = Counter()
+        self.acceptes = Counter()
+        self.rejets_g2 = 0
+        self.rejets_fin = 0
+        self.rejets_angle = 0
+        self.rejets_roue = 0
+        self.rejets_sg = 0
+        self.appels_sg = 0
+        self.temps_sg = 0.0
+        self.cache = {}
+        self.duree = 0.0
+        self.table_sg = None  # SG précalculés (mode crible), sinon None
+        self.arret = None  # "complet", "timeout", "stop", "bloque" ou "aucun_sg"
+
+    def as_dict(self):
+        return {
+            "tentatives": self.tentatives,
+            "tirages": dict(self.tirages),
+            "acceptes": dict(self.acceptes),
+            "rejets_g2": self.rejets_g2,
+            "rejets_fin": self.rejets_fin,
+            "rejets_angle": self.rejets_angle,
+            "rejets_roue": self.rejets_roue,
+            "rejets_sg": self.rejets_sg,
+            "appels_sg": self.appels_sg,
+            "temps_sg": self.temps_sg,
+            "cache": dict(self.cache),
+            "table_sg": self.table_sg,
+            "duree": self.duree,
+            "arret": self.arret,
+        }
+
+    def resume(self):
+        """Bilan texte (CLI, journaux)."""
+        lignes = [f"Arrêt : {self.arret} après {self.duree:.2f} s, {self.tentatives} tentatives"]
+        for source in sorted(self.tirages):
+            t, a = self.tirages[source], self.acceptes[source]
+            lignes.append(f"  {source:6} : {a}/{t} acceptés ({100 * a / t:.2f} %)")
+        lignes.append(f"Rejets : G2 {self.rejets_g2} | > fin {self.rejets_fin} | angle {self.rejets_angle}"
+                      f" | roue {self.rejets_roue} | non SG {self.rejets_sg}")
+        part = 100 * self.temps_sg / self.duree if self.duree else 0.0
+        lignes.append(f"is_sg : {self.appels_sg} appels, {self.temps_sg:.3f} s ({part:.1f} % de la durée)")
+        if self.table_sg is not None:
+            lignes.append(f"Table crible : {self.table_sg} SG de l'angle 348° (consultations O(1))")
+        if self.cache:
+            lignes.append(f"Cache : {self.cache['hits']} hits, {self.cache['misses']} tests,"
+                          f" {self.cache['filtres_roue']} décidés par la roue")
+        return "\n".join(lignes)
+
+
+def _profilable(fonction):
+    """Ajoute profil=chemin : l'appel est exécuté sous cProfile et dumpé (pstats / snakeviz)."""
+    @functools.wraps(fonction)
+    def enveloppe(*args, profil=None, **kwargs):
+        if not profil:
+            return fonction(*args, **kwargs)
+        import cProfile
+        profileur = cProfile.Profile()
+        try:
+            return profileur.runcall(fonction, *args, **kwargs)
+        finally:
+            profileur.dump_stats(profil)
+    return enveloppe
+
+
+def _activite_cache(avant):
+    """Différence des compteurs de prime_cache depuis l'instantané avant."""
+    apres = prime_cache.stats()
+    return {c: apres[c] - avant[c] for c in ("hits", "misses", "filtres_roue")}
+
+
+class TableSG348:
+    """
+    SG de l'angle 348° de [start, end] criblés une fois, en table dense :
+    octet i <-> base + 30 i. Appartenance en O(1), sans primalité.
+    Construction interrompue par stop_event ou passé echeance (time.time()) :
+    complete vaut alors False et la table ne doit pas être consultée.
+    """
+
+    def __init__(self, start, end, stop_event=None, echeance=None):
+        self.base = debut_corrige_348(start)
+        self.end = end
+        self.octets = bytearray(max(0, (end - self.base) // 30 + 1))
+        self.n = 0
+        self.complete = False
+        for p in _sg_348(start, end, stop_event):
+            self.octets[(p - self.base) // 30] = 1
+            self.n += 1
+            if echeance is not None and self.n % 256 == 0 and time.time() > echeance:
+                return
+        self.complete = stop_event is None or not stop_event.is_set()
+
+    def __contains__(self, n):
+        d = n - self.base
+        return 0 <= d and n <= self.end and d % 30 == 0 and self.octets[d // 30] == 1
+
+    def premier(self):
+        """Plus petit SG de la table, ou None."""
+        i = self.octets.find(1)
+        return None if i < 0 else self.base + 30 * i
+
+
+def _pas_sans_rejet(p, last_k, automate, source, end, rng, roue, tester_sg, stats, table=None):
+    """
+    Un pas G1/G2 sans rejet : les k de la ligne last_k de l'automate qui
+    passent la borne et la roue sont tirés sans remise, selon leurs poids,
+    jusqu'au premier SG. Avec une TableSG348, tous les k de la ligne sont
+    confrontés d'un coup à la table et un seul tirage suffit. Loi identique à « tirer, filtrer G2, recommencer »
+    (loi du tirage conditionnée à l'acceptation), sans tentative perdue.
+    Retourne k, ou None si aucun k ne mène à un SG (chaîne bloquée).
+    """
+    ks, poids = automate.get(last_k) or automate[None]
+    candidats = []
+    for k, w in zip(ks, poids):
+        if w <= 0:
+            continue
+        if p + 30*k > end:
+            stats.rejets_fin += 1
+        elif roue and not roue.k_admissible(p, k):
+            stats.rejets_roue += 1
+        elif table is not None and p + 30*k not in table:
+            stats.rejets_sg += 1
+        else:
+            candidats.append((k, w))
+    total = sum(w for _, w in candidats)
+    while candidats:
+        u = rng.random() * total
+        i = 0
+        while i < len(candidats) - 1 and u >= candidats[i][1]:
+            u -= candidats[i][1]
+            i += 1
+        k, w = candidats.pop(i)
+        total -= w
+        stats.tirages[source] += 1
+        if tester_sg(p + 30*k):
+            stats.acceptes[source] += 1
+            return k
+        stats.rejets_sg += 1
+    return None
+
+# ============================
+#  GÉNÉRATEUR SG GRAMMATICAL
+# ============================
+
+@_profilable
+def generate_sg_grammar_strict(start, end, count, rng,
+                               use_g1=True, use_g2=True, use_g3=True,
+                               progress_callback=None, time_callback=None,
+                               timeout_seconds=120, backend=None,
+                               roue_borne=ROUE_BORNE_DEFAUT, stop_event=None,
+                               stats=None, grammaire=None, sans_rejet=False,
+                               crible=False):
+    """
+    Chaîne SG grammaticale. grammaire : Grammaire compilée (défaut : tables
+    historiques) ; stats : StatsGenerateur rempli pendant l'appel ;
+    profil=chemin (voir _profilable) : dump cProfile de l'appel.
+    sans_rejet : sans G3, chaque pas est tiré dans l'automate G1/G2 (voir
+    _pas_sans_rejet) ; même loi, autre flux aléatoire que la boucle de rejet.
+    crible : si crible_raisonnable(start, end), les SG de l'intervalle sont
+    criblés d'avance (TableSG348) et chaque test devient une consultation ;
+    la roue est alors inutile. Même loi et même flux que sans crible. La
+    table dispose au plus de la moitié de timeout_seconds, sinon retour aux
+    tests de primalité.
+    """
+
+    if stats is None:
+        stats = StatsGenerateur()
+    if grammaire is None:
+        grammaire = GRAMMAIRE_DEFAUT
+    seuil_c, seuil_b, seuil_a = grammaire.seuils_g3
+    matrice_g2, largeur = grammaire.matrice_g2, grammaire.largeur
+
+    if not (use_g1 or use_g2 or use_g3):
+        stats.arret = "aucun_sg"
+        return [], []
+
+    cache_avant = prime_cache.stats()
+    t_debut = time.perf_counter()
+    start_time = time.time()
+
+    table = None
+    if crible and crible_raisonnable(start, end):
+        table = TableSG348(start, end, stop_event, echeance=start_time + timeout_seconds / 2)
+        if table.complete:
+            stats.table_sg = table.n
+        else:
+            table = None
+
+    def tester_sg(n):
+        stats.appels_sg += 1
+        t0 = time.perf_counter()
+        ok = n in table if table is not None else is_sg(n, backend)
+        stats.temps_sg += time.perf_counter() - t0
+        return ok
+
+    def conclure(arret):
+        stats.arret = arret
+        stats.duree = time.perf_counter() - t_debut
+        stats.cache = _activite_cache(cache_avant)
+
+    # Roue de résidus : rejette en O(1) les k dont p+30k ou 2(p+30k)+1
+    # a un facteur premier <= roue_borne, avant tout test de primalité
+    roue = RoueResidus(roue_borne) if roue_borne and table is None else None
+
+    # G3 dépend de l'historique des rejets (last_was_anomaly) : boucle de rejet
+    automate = grammaire.table_transitions(use_g1, use_g2) if sans_rejet and not use_g3 else None
+    source_g1 = "G1" if use_g1 else "hasard"
+
+    # Trouver un premier SG dans l’angle 348°
+    p = None
+    if table is not None:
+        p = table.premier()
+    else:
+        for n in range(start, end + 1):
+            if is_angle_348(n) and tester_sg(n):
+                p = n
+                break
+    if p is None:
+        conclure("aucun_sg")
+        return [], []
+
+    sg = [p]
+    gaps = []
+    last_k = None
+    last_was_anomaly = False
+
+    attempts = 0
+    arret = "complet"
+
+    while len(sg) < count:
+
+        if time.time() - start_time > timeout_seconds:
+            arret = "timeout"
+            break
+
+        if stop_event is not None and stop_event.is_set():
+            arret = "stop"
+            break
+
+        attempts += 1
+
+        if progress_callback:
+            progress_callback(len(sg), count)
+
+        if time_callback and attempts % 1000 == 0:
+            elapsed = time.time() - start_time
+            if len(sg) > 1:
+                rate = elapsed / (len(sg) - 1)
+                remaining = (count - len(sg)) * rate
+            else:
+                remaining = float("nan")
+            time_callback(elapsed, remaining)
+
+        if automate is not None:
+            k = _pas_sans_rejet(p, last_k, automate, source_g1, end, rng, roue, tester_sg, stats, table)
+            if k is None:
+                arret = "bloque"
+                break
+            p += 30*k
+            sg.append(p)
+            gaps.append(k)
+            last_k = k
+            continue
+
+        r = rng.random()
+        k = None
+
+        # G3 anomalies
+        if use_g3 and not last_was_anomaly:
+            if r < seuil_c:
+                seq = grammaire.g3_c.tirer(rng)
+                for k_seq in seq:
+                    stats.tirages["G3_C"] += 1
+                    candidate = p + 30*k_seq
+                    if candidate > end:
+                        stats.rejets_fin += 1
+                        continue
+                    if not is_angle_348(candidate):
+                        stats.rejets_angle += 1
+                        continue
+                    if roue and not roue.k_admissible(p, k_seq):
+                        stats.rejets_roue += 1
+                        continue
+                    if tester_sg(candidate):
+                        stats.acceptes["G3_C"] += 1
+                        sg.append(candidate)
+                        gaps.append(k_seq)
+                        p = candidate
+                        last_k = k_seq
+                        last_was_anomaly = True
+                    else:
+                        stats.rejets_sg += 1
+                continue
+            elif r < seuil_b:
+                k = grammaire.g3_b.tirer(rng)
+                source = "G3_B"
+                last_was_anomaly = True
+            elif r < seuil_a:
+                k = grammaire.g3_a.tirer(rng)
+                source = "G3_A"
+                last_was_anomaly = True
+
+        # G1 squelette
+        if k is None:
+            if use_g1:
+                k, source = grammaire.g1.tirer(rng), "G1"
+            else:
+                k, source = rng.randint(1, grammaire.k_hasard_max), "hasard"
+            last_was_anomaly = False
+        stats.tirages[source] += 1
+
+        # G2 motifs internes
+        if use_g2 and last_k is not None:
+            if not matrice_g2[last_k * largeur + k]:
+                if rng.random() > grammaire.p_hors_g2:
+                    stats.rejets_g2 += 1
+                    continue
+
+        candidate = p + 30*k
+        if candidate > end:
+            stats.rejets_fin += 1
+            continue
+
+        if not is_angle_348(candidate):
+            stats.rejets_angle += 1
+            continue
+
+        if roue and not roue.k_admissible(p, k):
+            stats.rejets_roue += 1
+            continue
+
+        if tester_sg(candidate):
+            stats.acceptes[source] += 1
+            sg.append(candidate)
+            gaps.append(k)
+            p = candidate
+            last_k = k
+        else:
+            stats.rejets_sg += 1
+
+    stats.tentatives = attempts
+    conclure(arret)
+    return sg, gaps
+
+# ============================
+#  GÉNÉRATEUR SAFE PRIMES
+# ============================
+
+@_profilable
+def generate_safe_primes_grammar(start, end, count_safe, rng,
+                                 use_g1=True, use_g2=True, use_g3=True,
+                                 progress_callback=None, time_callback=None,
+                                 timeout_seconds=120, backend=None, stop_event=None,
+                                 stats=None, grammaire=None, sans_rejet=False, crible=False):
+
+    if count_safe <= 0:
+        return [], []
+
+    # Chaque SG p de la chaîne donne un safe prime q = 2p + 1 : q est premier
+    # (déjà vérifié par is_sg, l'index ou la table du crible) et
+    # p ≡ 29 (mod 30) => q ≡ 59 ≡ 29 (mod 30), donc q est dans l'angle 348°.
+    # count_safe SG suffisent : ni surproduction, ni second test.
+    sg_used, _ = generate_sg_grammar_strict(
+        start, end, count_safe, rng,
+        use_g1=use_g1, use_g2=use_g2, use_g3=use_g3,
+        progress_callback=progress_callback,
+        time_callback=time_callback,
+        timeout_seconds=timeout_seconds,
+        backend=backend,
+        stop_event=stop_event,
+        stats=stats,
+        grammaire=grammaire,
+        sans_rejet=sans_rejet,
+        crible=crible
+    )
+
+    safe_primes = [2*p + 1 for p in sg_used]
+    return safe_primes, sg_used
+
+# ============================
+#  MODÈLE HASARD
+# ============================
+
+# Trois moteurs pour le même modèle (sous-ensemble uniforme, sans remise,
+# des SG de l'angle 348° dans [start, end]) :
+#   "crible"    : SG énumérés une fois par crible (ou index), puis
+#                 rng.sample en O(count) ;
+#   "reservoir" : même énumération en flux, échantillon de réservoir de
+#                 taille count (mémoire O(count), intervalles très larges) ;
+#   "tirages"   : tirages uniformes rejetés si non SG (intervalles trop
+#                 grands ou trop hauts pour être criblés) ; peut rendre
+#                 moins de count SG.
+# "auto" crible (crible, ou reservoir au-delà de LARGEUR_MAX_CRIBLE) tant
+# que duree_crible reste sous DUREE_MAX_CRIBLE, sinon tire. Le crible ne
+# coûte pas que la largeur : ses premiers de base vont jusqu'à √(2·end) et
+# chaque segment les reparcourt, d'où plusieurs secondes dès end ~ 1e15
+# pour un intervalle minuscule, là où les tirages prennent 10 ms.
+
+METHODES_HASARD = ("auto", "crible", "reservoir", "tirages")
+LARGEUR_MAX_CRIBLE = 50_000_000
+DUREE_MAX_CRIBLE = 2.0  # s
+
+# Coûts unitaires de crible_sg mesurés en CPython (ordre de grandeur)
+_S_PAR_ENTIER_BASE = 6e-8     # crible des premiers de base, par entier <= √(2·end)
+_S_PAR_PREMIER_BASE = 1.5e-6  # passage d'un premier de base sur un segment
+_S_PAR_ENTIER = 1e-8          # marquage / énumération, par entier de [start, end]
+
+
+def crible_raisonnable(start, end):
+    """True si cribler [start, end] d'avance (option crible) tient en mémoire et dans DUREE_MAX_CRIBLE."""
+    return end - start <= LARGEUR_MAX_CRIBLE and duree_crible(start, end) <= DUREE_MAX_CRIBLE
+
+
+def duree_crible(start, end):
+    """Durée estimée (s) de l'énumération des SG de [start, end] : index, ou crible segmenté."""
+    largeur = max(0, end - start + 1)
+    if index_sg.couvre(start, end):
+        return _S_PAR_ENTIER * largeur
+    racine = math.isqrt(2 * end + 1)
+    nb_base = racine / max(1.0, math.log(racine))
+    segments = largeur // (2 * TAILLE_SEGMENT) + 1
+    return (_S_PAR_ENTIER_BASE * racine + _S_PAR_PREMIER_BASE * segments * nb_base
+            + _S_PAR_ENTIER * largeur)
+
+
+def _sg_348(start, end, stop_event=None):
+    """SG de l'angle 348° dans [start, end], en flux croissant."""
+    source = (index_sg.iter_range(start, end) if index_sg.couvre(start, end)
+              else iter_sg(start, end))
+    for i, p in enumerate(source):
+        if stop_event is not None and i % 4096 == 0 and stop_event.is_set():
+            return
+        if is_angle_348(p):
+            yield p
+
+
+def _hasard_tirages(start, end, count, rng, backend, stop_event):
+    vus = set()
+    trials = 0
+    while len(vus) < count and trials < count * 200:
+        if stop_event is not None and stop_event.is_set():
+            break
+        n = rng.randint(start, end)
+        if is_angle_348(n) and is_sg(n, backend):
+            vus.add(n)
+        trials += 1
+    return list(vus)
+
+
+def _hasard_reservoir(start, end, count, rng, stop_event):
+    reservoir = []
+    for i, p in enumerate(_sg_348(start, end, stop_event)):
+        if i < count:
+            reservoir.append(p)
+        else:
+            j = rng.randrange(i + 1)
+            if j < count:
+                reservoir[j] = p
+    return reservoir
+
+
+def generate_random_model(start, end, count, rng=None, backend=None, stop_event=None,
+                          methode="auto"):
+    if rng is None:
+        rng = random.Random()
+    if methode not in METHODES_HASARD:
+        raise ValueError(f"Méthode inconnue : {methode!r} (choix : {', '.join(METHODES_HASARD)})")
+    if methode == "auto":
+        if duree_crible(start, end) > DUREE_MAX_CRIBLE:
+            methode = "tirages"
+        else:
+            methode = "crible" if end - start + 1 <= LARGEUR_MAX_CRIBLE else "reservoir"
+
+    if count <= 0:
+        sg_list = []
+    elif methode == "crible":
+        population = list(_sg_348(start, end, stop_event))
+        sg_list = rng.sample(population, min(count, len(population)))
+    elif methode == "reservoir":
+        sg_list = _hasard_reservoir(start, end, count, rng, stop_event)
+    else:
+        sg_list = _hasard_tirages(start, end, count, rng, backend, stop_event)
+
+    sg_list.sort()
+    gaps = [(sg_list[i] - sg_list[i-1]) // 30 for i in range(1, len(sg_list))]
+    return sg_list, gaps
+
+# ============================
+#  RECOMMANDATION SG
+# ============================
+
+def recommend_sg_max(interval_size, use_g2, use_g3):
+    base = interval_size / 2000
+    if use_g2:
+        base *= 0.7
+    if use_g3:
+        base *= 0.5
+    return max(5, int(base))
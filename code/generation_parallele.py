@@ -0,0 +1,101 @@
+import hashlib
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generateur_sg import StatsGenerateur, generate_sg_grammar_strict
+
+# =============================================================================
+# GÉNÉRATION PARALLÈLE (MULTI-PROCESSUS)
+# =============================================================================
+#
+# Deux modes :
+#   - generate_sg_shards : [start, end] est découpé en N tranches contiguës,
+#     une chaîne par tranche, fusionnées dans l'ordre en une seule sortie ;
+#   - generate_sg_chains : N chaînes indépendantes sur tout l'intervalle.
+# Chaque worker reçoit une graine dérivée de (seed, indice) : un même appel
+# redonne exactement le même résultat, quel que soit l'ordonnancement.
+
+
+def graine_derivee(seed, indice):
+    """Graine 64 bits reproductible pour le worker numéro indice."""
+    h = hashlib.sha256(f"{seed}:{indice}".encode()).digest()
+    return int.from_bytes(h[:8], "little")
+
+
+def _executer_shard(indice, start, end, count, graine, options):
+    t0 = time.time()
+    compteurs = StatsGenerateur()
+    sg, gaps = generate_sg_grammar_strict(start, end, count, random.Random(graine),
+                                          stats=compteurs, **options)
+    stats = {
+        "shard": indice,
+        "start": start,
+        "end": end,
+        "seed": graine,
+        "demandes": count,
+        "generes": len(sg),
+        "duree": time.time() - t0,
+        "generateur": compteurs.as_dict(),
+    }
+    return sg, gaps, stats
+
+
+def _decouper(start, end, n):
+    taille = (end - start + 1) // n
+    bornes = []
+    for i in range(n):
+        lo = start + i * taille
+        hi = end if i == n - 1 else lo + taille - 1
+        bornes.append((lo, hi))
+    return bornes
+
+
+def _repartir(count, n):
+    return [count // n + (1 if i < count % n else 0) for i in range(n)]
+
+
+def _lancer(taches, seed, workers, options):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_executer_shard, i, lo, hi, c, graine_derivee(seed, i), options)
+            for i, (lo, hi, c) in enumerate(taches)
+        ]
+        return [f.result() for f in futures]
+
+
+def generate_sg_shards(start, end, count, seed=0, workers=None, **options):
+    """
+    Découpe [start, end] en `workers` tranches et génère une chaîne par
+    tranche en parallèle. Retourne (sg, gaps, stats_par_shard) ; les écarts
+    aux jonctions entre tranches sont inclus dans gaps et leurs positions
+    listées dans stats_par_shard[i]["jonction"].
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, count, end - start + 1))
+    bornes = _decouper(start, end, workers)
+    taches = [(lo, hi, c) for (lo, hi), c in zip(bornes, _repartir(count, workers))]
+
+    sg, gaps, stats = [], [], []
+    for sg_i, gaps_i, st in _lancer(taches, seed, workers, options):
+        st["jonction"] = None
+        if sg and sg_i:
+            st["jonction"] = len(gaps)
+            gaps.append((sg_i[0] - sg[-1]) // 30)
+        sg.extend(sg_i)
+        gaps.extend(gaps_i)
+        stats.append(st)
+    return sg, gaps, stats
+
+
+def generate_sg_chains(start, end, count, n_chains, seed=0, workers=None, **options):
+    """
+    Génère n_chains chaînes indépendantes de `count` SG sur [start, end].
+    Retourne (chaines, stats) avec chaines = [(sg, gaps), ...] dans l'ordre
+    des indices de chaîne.
+    """
+    workers = workers or os.cpu_count() or 1
+    taches = [(start, end, count)] * n_chains
+    resultats = _lancer(taches, seed, min(workers, n_chains), options)
+    return [(sg, gaps) for sg, gaps, _ in resultats], [st for _, _, st in resultats]
@@ -1,10 +1,10 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-import networkx as nx
 import numpy as np
 from collections import Counter
 import os
 
+from chargeur_g3 import charger_g3
+
 def generer_graphique_synthese(chemin_fichier):
     """
     Génère un graphique de synthèse explicatif optimisé pour la lisibilité.
@@ -15,8 +15,7 @@ def generer_graphique_synthese(chemin_fichier):
         return
 
     # 1. Chargement et nettoyage
-    df = pd.read_csv(chemin_fichier, sep=None, engine='python')
-    df.columns = [c.strip() for c in df.columns]
+    df = charger_g3(chemin_fichier)
     
     total = len(df)
     
@@ -85,6 +84,7 @@ def generer_graphique_synthese(chemin_fichier):
 
     # --- ZONE 4 : LA ROUE DES TRANSITIONS ---
     ax_graph = fig.add_subplot(grid[1, 1])
+    import networkx as nx  # seulement pour la roue des transitions
     G = nx.DiGraph()
     
     pos = {132: (0, 1.1), 276: (1.0, -0.6), 348: (-1.0, -0.6)}
@@ -0,0 +1,216 @@
+import json
+
+# =============================================================================
+# GRAMMAIRES G1 / G2 / G3 COMPILÉES
+# =============================================================================
+#
+# Une Grammaire regroupe tout ce que le générateur et la classification
+# consultent, sous une forme prête à l'emploi :
+#   - matrice_g2 : matrice booléenne à plat, matrice_g2[last_k * largeur + k]
+#     vaut 1 si (last_k, k) est un 2-uplet G2 (plus de parcours de liste) ;
+#   - Alphabet (G1, G3_A, G3_B, G3_C) : tirage uniforme par rng.choice, ou
+#     pondéré par table d'alias (Vose) si des poids sont fournis, en O(1) ;
+#   - deltas_g1 / deltas_g2 : frozensets de la classification des Δ ;
+#   - table_transitions : automate pondéré G1/G2, poids de chaque k sachant
+#     last_k (tirage × filtre G2), pour l'échantillonnage sans rejet.
+# Une grammaire se charge depuis un fichier JSON (voir depuis_dict pour les
+# clés) ; GRAMMAIRE_DEFAUT reprend les tables historiques.
+
+G1 = [1, 2, 3, 4, 5, 7, 8, 9, 12, 13, 14, 15]
+
+G2_2uplets = [
+    (1,8), (8,5), (5,1),
+    (2,13), (13,2),
+    (7,4), (4,7),
+    (1,12), (12,1),
+    (9,3), (3,8),
+    (5,4), (4,9),
+    (8,13), (13,7),
+]
+
+G3_A = [3, 4, 6, 9, 11, 14, 15, 16, 18, 19, 20, 21, 22]
+G3_B = [24, 28, 29, 30, 31, 34, 36, 37, 42, 44]
+G3_C = [
+    [20,29,3], [19,30], [4,11], [15,30],
+    [21,21,23,11,3,3,4,4,24,3,22],
+    [15,9], [4,3,14], [9,44], [19,3,18],
+    [26,15,15,3,10,16], [42,6,22], [17,3],
+    [11,10], [22,9,4,14], [3,44,17],
+    [20,14], [24,18,20], [27,34], [18,19,30],
+    [32,10,9], [24,71,17,4], [15,19], [3,3],
+    [37,18,36,22], [34,21], [4,14], [4,21,4],
+    [15,4,31,11], [19,36,14,6,15],
+]
+
+# Seuils cumulés de r = rng.random() pour G3_C, G3_B, G3_A
+SEUILS_G3 = (0.001, 0.01, 0.03)
+# Écarts k tirés dans 1..K_HASARD_MAX quand G1 est désactivée
+K_HASARD_MAX = 40
+# Probabilité de garder un k qui ne forme pas un 2-uplet G2 avec last_k
+P_HORS_G2 = 0.5
+
+DELTAS_G1 = (6, 12, 18, 24)
+DELTAS_G2 = (6, 12)
+
+
+def _table_alias(poids):
+    """Tables (prob, alias) de la méthode d'alias de Vose pour des poids > 0."""
+    n = len(poids)
+    total = float(sum(poids))
+    echelle = [w * n / total for w in poids]
+    prob, alias = [1.0] * n, list(range(n))
+    petits = [i for i, e in enumerate(echelle) if e < 1.0]
+    grands = [i for i, e in enumerate(echelle) if e >= 1.0]
+    while petits and grands:
+        s, g = petits.pop(), grands.pop()
+        prob[s], alias[s] = echelle[s], g
+        echelle[g] -= 1.0 - echelle[s]
+        (petits if echelle[g] < 1.0 else grands).append(g)
+    return prob, alias
+
+
+class Alphabet:
+    """Valeurs tirables : uniformes (rng.choice) ou pondérées (alias, O(1))."""
+
+    def __init__(self, valeurs, poids=None):
+        self.valeurs = [tuple(v) if isinstance(v, list) else v for v in valeurs]
+        if not self.valeurs:
+            raise ValueError("Alphabet vide")
+        self.poids = None
+        if poids is not None:
+            if len(poids) != len(self.valeurs) or min(poids) <= 0:
+                raise ValueError("Il faut un poids > 0 par valeur")
+            self.poids = list(poids)
+            self._prob, self._alias = _table_alias(self.poids)
+        self.ensemble = frozenset(self.valeurs)
+
+    def tirer(self, rng):
+        # Uniforme : rng.choice, même flux aléatoire que les listes historiques
+        if self.poids is None:
+            return rng.choice(self.valeurs)
+        i = rng.randrange(len(self.valeurs))
+        return self.valeurs[i] if rng.random() < self._prob[i] else self.valeurs[self._alias[i]]
+
+    def probabilites(self):
+        """Probabilité de tirage de chaque valeur (dans l'ordre de valeurs)."""
+        if self.poids is None:
+            return [1 / len(self.valeurs)] * len(self.valeurs)
+        total = sum(self.poids)
+        return [w / total for w in self.poids]
+
+    def __contains__(self, v):
+        return v in self.ensemble
+
+    def __len__(self):
+        return len(self.valeurs)
+
+
+class Grammaire:
+    """Tables G1 / G2 / G3 compilées pour generate_sg_grammar_strict."""
+
+    def __init__(self, g1=G1, g2_2uplets=G2_2uplets, g3_a=G3_A, g3_b=G3_B, g3_c=G3_C,
+                 poids=None, seuils_g3=SEUILS_G3, deltas_g1=DELTAS_G1, deltas_g2=DELTAS_G2,
+                 k_hasard_max=K_HASARD_MAX, p_hors_g2=P_HORS_G2):
+        poids = poids or {}
+        self.g1 = Alphabet(g1, poids.get("G1"))
+        self.g3_a = Alphabet(g3_a, poids.get("G3_A"))
+        self.g3_b = Alphabet(g3_b, poids.get("G3_B"))
+        self.g3_c = Alphabet(g3_c, poids.get("G3_C"))
+        self.g2_2uplets = frozenset(tuple(c) for c in g2_2uplets)
+        self.seuils_g3 = tuple(seuils_g3)
+        if list(self.seuils_g3) != sorted(self.seuils_g3) or len(self.seuils_g3) != 3:
+            raise ValueError("seuils_g3 : trois seuils croissants (G3_C, G3_B, G3_A)")
+        self.k_hasard_max = k_hasard_max
+        if not 0 <= p_hors_g2 <= 1:
+            raise ValueError("p_hors_g2 doit être dans [0, 1]")
+        self.p_hors_g2 = p_hors_g2
+        self.deltas_g1 = frozenset(deltas_g1)
+        self.deltas_g2 = frozenset(deltas_g2)
+
+        # Tout k pouvant devenir last_k ou être tiré a sa ligne / colonne
+        ks = set(self.g1.valeurs) | set(self.g3_a.valeurs) | set(self.g3_b.valeurs)
+        ks.update(k for seq in self.g3_c.valeurs for k in seq)
+        ks.update(k for c in self.g2_2uplets for k in c)
+        self.largeur = max(max(ks), k_hasard_max) + 1
+        self.matrice_g2 = bytearray(self.largeur * self.largeur)
+        for a, b in self.g2_2uplets:
+            self.matrice_g2[a * self.largeur + b] = 1
+        self._tables = {}
+
+    def table_transitions(self, use_g1=True, use_g2=True):
+        """
+        Automate pondéré G1/G2 : {last_k: (ks, poids)}, poids[i] étant la
+        probabilité qu'une tentative tire ks[i] et passe le filtre G2 ; la
+        clé None (premier pas, ou G2 désactivée) ne filtre pas.
+        """
+        cle = (use_g1, use_g2)
+        if cle not in self._tables:
+            if use_g1:
+                ks, pi = self.g1.valeurs, self.g1.probabilites()
+            else:
+                ks = list(range(1, self.k_hasard_max + 1))
+                pi = [1 / len(ks)] * len(ks)
+            lignes = {None: (ks, pi)}
+            if use_g2:
+                for last in range(self.largeur):
+                    ligne = self.matrice_g2[last * self.largeur:(last + 1) * self.largeur]
+                    lignes[last] = (ks, [q * (1.0 if ligne[k] else self.p_hors_g2)
+                                         for k, q in zip(ks, pi)])
+            self._tables[cle] = lignes
+        return self._tables[cle]
+
+    def classer(self, delta):
+        """
+        (G1, G2, G3) d'un écart Δ entre SG consécutifs :
+        G1 alphabet fondamental (deltas_g1), G2 briques stables (deltas_g2),
+        G3 anomalies (hors G1).
+        """
+        g1 = 1 if delta in self.deltas_g1 else 0
+        g2 = 1 if delta in self.deltas_g2 else 0
+        return g1, g2, 1 - g1
+
+    # ------------------------------------------------------------
+    #  CONFIGURATION
+    # ------------------------------------------------------------
+    @classmethod
+    def depuis_dict(cls, d):
+        """
+        Clés (toutes optionnelles, défauts historiques) : G1, G2, G3_A, G3_B,
+        G3_C, poids ({"G1": [...], ...}), seuils_G3, deltas_G1, deltas_G2,
+        k_hasard_max, p_hors_G2.
+        """
+        inconnues = set(d) - {"G1", "G2", "G3_A", "G3_B", "G3_C", "poids", "seuils_G3",
+                              "deltas_G1", "deltas_G2", "k_hasard_max", "p_hors_G2"}
+        if inconnues:
+            raise ValueError(f"Clé(s) de grammaire inconnue(s) : {', '.join(sorted(inconnues))}")
+        return cls(g1=d.get("G1", G1), g2_2uplets=d.get("G2", G2_2uplets),
+                   g3_a=d.get("G3_A", G3_A), g3_b=d.get("G3_B", G3_B), g3_c=d.get("G3_C", G3_C),
+                   poids=d.get("poids"), seuils_g3=d.get("seuils_G3", SEUILS_G3),
+                   deltas_g1=d.get("deltas_G1", DELTAS_G1), deltas_g2=d.get("deltas_G2", DELTAS_G2),
+                   k_hasard_max=d.get("k_hasard_max", K_HASARD_MAX),
+                   p_hors_g2=d.get("p_hors_G2", P_HORS_G2))
+
+    @classmethod
+    def depuis_json(cls, chemin):
+        with open(chemin, encoding="utf-8") as f:
+            return cls.depuis_dict(json.load(f))
+
+    def as_dict(self):
+        poids = {nom: a.poids for nom, a in (("G1", self.g1), ("G3_A", self.g3_a),
+                                             ("G3_B", self.g3_b), ("G3_C", self.g3_c)) if a.poids}
+        return {
+            "G1": self.g1.valeurs,
+            "G2": sorted(self.g2_2uplets),
+            "G3_A": self.g3_a.valeurs,
+            "G3_B": self.g3_b.valeurs,
+            "G3_C": [list(s) for s in self.g3_c.valeurs],
+            "poids": poids,
+            "seuils_G3": list(self.seuils_g3),
+            "deltas_G1": sorted(self.deltas_g1),
+            "deltas_G2": sorted(self.deltas_g2),
+            "k_hasard_max": self.k_hasard_max,
+            "p_hors_G2": self.p_hors_g2,
+        }
+
+
+GRAMMAIRE_DEFAUT = Grammaire()
@@ -0,0 +1,196 @@
+import mmap
+import os
+import threading
+import time
+
+from crible_sg import iter_sg
+
+# =============================================================================
+# INDEX PERSISTANT DES NOMBRES DE SOPHIE GERMAIN
+# =============================================================================
+#
+# Tout SG p > 5 vérifie p ≡ 11, 23 ou 29 (mod 30) : 3 bits suffisent pour
+# chaque bloc de 30 entiers. L'axe des entiers est découpé en tranches de
+# BLOCS_PAR_TRANCHE blocs ; chaque tranche calculée est un fichier binaire
+# (3 Mo) relu par mmap, de sorte qu'un intervalle déjà criblé ne coûte plus
+# que des lectures disque.
+
+RESIDUS_SG = (11, 23, 29)
+_RANG_RESIDU = {r: i for i, r in enumerate(RESIDUS_SG)}
+SG_PETITS = (2, 3, 5)
+
+BLOCS_PAR_TRANCHE = 1 << 23
+ENTIERS_PAR_TRANCHE = 30 * BLOCS_PAR_TRANCHE
+OCTETS_PAR_TRANCHE = 3 * BLOCS_PAR_TRANCHE // 8
+
+DOSSIER_DEFAUT = os.environ.get(
+    "SG_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "index_sg"),
+)
+
+# Une tranche absente est re-cherchée sur disque après ce délai : une tranche
+# calculée par un autre processus (cli_sg.py index) devient visible sans
+# redémarrage
+DELAI_ABSENCE = 5.0
+
+# Positions des bits à 1 pour chaque valeur d'octet
+_BITS_OCTET = [tuple(j for j in range(8) if v >> j & 1) for v in range(256)]
+
+
+class IndexSG:
+    """Index des SG sur disque, par tranches mappées en mémoire."""
+
+    def __init__(self, dossier=DOSSIER_DEFAUT, calculer=True):
+        self.dossier = dossier
+        self.calculer = calculer
+        self._tranches = {}
+        self._absentes = {}  # tranche -> instant (monotonic) du dernier échec
+        # Index partagé entre les travaux de la GUI : une tranche n'est
+        # cherchée, calculée et mappée qu'une fois, par un seul thread
+        self._verrou = threading.Lock()
+
+    # ------------------------------------------------------------
+    #  TRANCHES
+    # ------------------------------------------------------------
+    def _chemin(self, t):
+        return os.path.join(self.dossier, f"sg_{t:08d}.bits")
+
+    def est_calculee(self, t):
+        return t in self._tranches or os.path.exists(self._chemin(t))
+
+    def calculer_tranche(self, t):
+        """Crible la tranche t et l'écrit sur disque."""
+        os.makedirs(self.dossier, exist_ok=True)
+        base = t * ENTIERS_PAR_TRANCHE
+        bits = bytearray(OCTETS_PAR_TRANCHE)
+        for p in iter_sg(max(base, 7), base + ENTIERS_PAR_TRANCHE - 1):
+            pos = 3 * ((p - base) // 30) + _RANG_RESIDU[p % 30]
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+        chemin = self._chemin(t)
+        tmp = f"{chemin}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(bits)
+        os.replace(tmp, chemin)
+        self._absentes.pop(t, None)
+
+    def _tranche(self, t):
+        """mmap de la tranche t, ou None si absente et calculer=False."""
+        mm = self._tranches.get(t)  # publiée entièrement construite : lecture sans verrou
+        if mm is not None:
+            return mm
+        with self._verrou:
+            return self._charger_tranche(t)
+
+    def _charger_tranche(self, t):
+        mm = self._tranches.get(t)
+        if mm is not None:
+            return mm
+        echec = self._absentes.get(t)
+        if echec is not None and time.monotonic() - echec < DELAI_ABSENCE:
+            return None
+        if not os.path.exists(self._chemin(t)):
+            if not self.calculer:
+                # Mémorisé (DELAI_ABSENCE) pour éviter un stat() disque à chaque requête
+                self._absentes[t] = time.monotonic()
+                return None
+            self.calculer_tranche(t)
+        self._absentes.pop(t, None)
+        with open(self._chemin(t), "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._tranches[t] = mm
+        return mm
+
+    def couvre(self, lo, hi):
+        """True si toutes les tranches couvrant [lo, hi] sont calculées."""
+        return all(self.est_calculee(t)
+                   for t in range(max(lo, 0) // ENTIERS_PAR_TRANCHE, hi // ENTIERS_PAR_TRANCHE + 1))
+
+    def assurer(self, lo, hi, rappel=None):
+        """
+        Calcule toutes les tranches manquantes couvrant [lo, hi] ; retourne le
+        nombre de tranches calculées. rappel(t, faites, a_faire) après chacune.
+        """
+        manquantes = [t for t in range(max(lo, 0) // ENTIERS_PAR_TRANCHE, hi // ENTIERS_PAR_TRANCHE + 1)
+                      if not self.est_calculee(t)]
+        for i, t in enumerate(manquantes, 1):
+            self.calculer_tranche(t)
+            if rappel:
+                rappel(t, i, len(manquantes))
+        return len(manquantes)
+
+    def fermer(self):
+        with self._verrou:
+            tranches, self._tranches = self._tranches, {}
+            self._absentes.clear()
+        for mm in tranches.values():
+            mm.close()
+
+    # ------------------------------------------------------------
+    #  REQUÊTES
+    # ------------------------------------------------------------
+    def consulter(self, n):
+        """True / False si n est couvert par l'index, None sinon."""
+        if n < 7:
+            return n in SG_PETITS
+        rang = _RANG_RESIDU.get(n % 30)
+        if rang is None:
+            return False
+        t, reste = divmod(n, ENTIERS_PAR_TRANCHE)
+        mm = self._tranche(t)
+        if mm is None:
+            return None
+        pos = 3 * (reste // 30) + rang
+        return bool(mm[pos >> 3] >> (pos & 7) & 1)
+
+    def is_sg(self, n):
+        resultat = self.consulter(n)
+        if resultat is None:
+            raise LookupError(f"{n} hors des tranches calculées de l'index")
+        return resultat
+
+    def _iter_tranche(self, t, lo, hi):
+        mm = self._tranche(t)
+        if mm is None:
+            raise LookupError(f"Tranche {t} absente de l'index")
+        base = t * ENTIERS_PAR_TRANCHE
+        o_lo = max(0, 3 * ((lo - base) // 30)) >> 3
+        o_hi = min(OCTETS_PAR_TRANCHE - 1, (3 * ((hi - base) // 30) + 2) >> 3)
+        for o, v in enumerate(mm[o_lo:o_hi + 1], o_lo):
+            if v:
+                for j in _BITS_OCTET[v]:
+                    bloc, rang = divmod(8 * o + j, 3)
+                    p = base + 30 * bloc + RESIDUS_SG[rang]
+                    if lo <= p <= hi:
+                        yield p
+
+    def iter_range(self, lo, hi):
+        for p in SG_PETITS:
+            if lo <= p <= hi:
+                yield p
+        lo = max(lo, 7)
+        if lo > hi:
+            return
+        for t in range(lo // ENTIERS_PAR_TRANCHE, hi // ENTIERS_PAR_TRANCHE + 1):
+            yield from self._iter_tranche(t, lo, hi)
+
+    def sg_in_range(self, lo, hi):
+        """Liste triée des SG de [lo, hi]."""
+        return list(self.iter_range(lo, hi))
+
+    def next_sg(self, n):
+        """Plus petit SG strictement supérieur à n."""
+        for p in SG_PETITS:
+            if p > n:
+                return p
+        t = max(n + 1, 7) // ENTIERS_PAR_TRANCHE
+        while True:
+            base = t * ENTIERS_PAR_TRANCHE
+            for p in self._iter_tranche(t, max(n + 1, base), base + ENTIERS_PAR_TRANCHE - 1):
+                return p
+            t += 1
+
+
+def ouvrir_index(calculer=False):
+    """Index partagé par défaut ; en lecture seule sauf si calculer=True."""
+    return IndexSG(DOSSIER_DEFAUT, calculer=calculer)
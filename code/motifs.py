@@ -0,0 +1,200 @@
+import random
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# =============================================================================
+# MOTEUR DE MOTIFS (N-GRAMMES DE Δ)
+# =============================================================================
+#
+# Un seul passage compte toutes les tailles de motifs 1..L. Chaque fenêtre
+# de n Δ est codée par un entier : clé = Σ Δ_j << (bits · (n-1-j)), donc
+# exacte et décodable. Les données arrivent par blocs (ajouter) ; les L-1
+# derniers Δ sont gardés pour les fenêtres à cheval sur deux blocs.
+#
+#   mode "exact"   : un Counter par taille (ordre des égalités identique à
+#                    Counter.most_common sur les tuples)
+#   mode "approche": Count-Min Sketch par taille + ensemble borné des k
+#                    candidats les plus lourds (heavy hitters) réévalués
+#                    sur le sketch à chaque bloc : mémoire fixe quelle
+#                    que soit la diversité des motifs
+
+BITS_DELTA = 16
+MODES = ("exact", "approche")
+
+
+def empaqueter(d, n, bits=BITS_DELTA, debut=0):
+    """Clés int64 des fenêtres de n Δ de d à partir de debut ; ValueError si une clé déborde."""
+    d = np.asarray(d, dtype=np.int64)[debut:]
+    nb = len(d) - n + 1
+    if n * bits > 63:
+        raise ValueError(f"{n} Δ de {bits} bits ne tiennent pas dans une clé de 63 bits")
+    if nb <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if d.min() < 0 or d.max() >= 1 << bits:
+        raise ValueError(f"Δ hors de [0, 2^{bits}[ : augmenter bits")
+    codes = np.zeros(nb, dtype=np.int64)
+    for j in range(n):
+        codes <<= bits
+        codes |= d[j:j + nb]
+    return codes
+
+
+def depaqueter(cle, n, bits=BITS_DELTA):
+    """Motif (Δ_0, …, Δ_n-1) d'une clé produite par empaqueter."""
+    masque = (1 << bits) - 1
+    return tuple((cle >> (bits * (n - 1 - j))) & masque for j in range(n))
+
+
+class MoteurMotifs:
+    """Comptage en flux des motifs de Δ de tailles 1 à longueur_max."""
+
+    def __init__(self, longueur_max=3, mode="exact", k=50,
+                 largeur=1 << 16, profondeur=4, bits=BITS_DELTA, graine=0):
+        if mode not in MODES:
+            raise ValueError(f"Mode inconnu : {mode!r} (choix : {', '.join(MODES)})")
+        if mode == "approche" and np is None:
+            raise ImportError("Le mode approché nécessite numpy (pip install numpy)")
+        if largeur & (largeur - 1):
+            raise ValueError("largeur doit être une puissance de 2")
+
+        self.longueur_max = longueur_max
+        self.mode = mode
+        self.k = k
+        self.bits = bits
+        self.totaux = [0] * (longueur_max + 1)
+        self._queue = []
+
+        tailles = range(longueur_max + 1)
+        if mode == "exact":
+            self._comptes = [Counter() for _ in tailles]
+        else:
+            rng = random.Random(graine)
+            self._decalage = 64 - (largeur.bit_length() - 1)
+            self._hash_a = np.array([rng.getrandbits(64) | 1 for _ in range(profondeur)], dtype=np.uint64)
+            self._hash_b = np.array([rng.getrandbits(64) for _ in range(profondeur)], dtype=np.uint64)
+            self._cms = [np.zeros((profondeur, largeur), dtype=np.int64) for _ in tailles]
+            self._candidats = [{} for _ in tailles]
+
+    # ------------------------------------------------------------
+    #  CODAGE DES FENÊTRES
+    # ------------------------------------------------------------
+    def _comptes_bloc(self, d, n, debut):
+        """(clés, comptes) des fenêtres de taille n commençant à partir de debut,
+        dans l'ordre de première apparition."""
+        nb = len(d) - debut - n + 1
+        if nb <= 0:
+            return [], []
+        if np is not None and n * self.bits <= 63:
+            codes = empaqueter(d, n, self.bits, debut)
+            cles, premiers, comptes = np.unique(codes, return_index=True, return_counts=True)
+            ordre = np.argsort(premiers, kind="stable")
+            return cles[ordre].tolist(), comptes[ordre].tolist()
+
+        valeurs = d.tolist() if np is not None else d
+        c = Counter()
+        for i in range(debut, debut + nb):
+            cle = 0
+            for v in valeurs[i:i + n]:
+                cle = (cle << self.bits) | v
+            c[cle] += 1
+        return list(c.keys()), list(c.values())
+
+    def decoder(self, cle, n):
+        return depaqueter(cle, n, self.bits)
+
+    # ------------------------------------------------------------
+    #  ALIMENTATION
+    # ------------------------------------------------------------
+    def ajouter(self, deltas):
+        """Ajoute un bloc de Δ (liste, Series ou tableau) à la suite des précédents."""
+        if np is not None:
+            d = np.concatenate([np.asarray(self._queue, dtype=np.int64),
+                                np.asarray(deltas, dtype=np.int64)])
+            maxi = int(d.max()) if len(d) else 0
+            mini = int(d.min()) if len(d) else 0
+        else:
+            d = list(self._queue) + [int(x) for x in deltas]
+            maxi, mini = max(d, default=0), min(d, default=0)
+        if mini < 0 or maxi >= 1 << self.bits:
+            raise ValueError(f"Δ hors de [0, 2^{self.bits}[ : augmenter bits")
+
+        t = len(self._queue)
+        for n in range(1, self.longueur_max + 1):
+            cles, comptes = self._comptes_bloc(d, n, max(0, t - (n - 1)))
+            self.totaux[n] += sum(comptes)
+            if self.mode == "exact":
+                c = self._comptes[n]
+                for cle, nb in zip(cles, comptes):
+                    c[cle] += nb
+            else:
+                self._ajouter_approche(n, cles, comptes)
+
+        garde = self.longueur_max - 1
+        self._queue = (d[len(d) - garde:].tolist() if np is not None else d[len(d) - garde:]) if garde else []
+
+    def _hacher(self, cles):
+        c = np.array([cle & 0xFFFFFFFFFFFFFFFF for cle in cles], dtype=np.uint64)
+        return (c[None, :] * self._hash_a[:, None] + self._hash_b[:, None]) >> np.uint64(self._decalage)
+
+    def _estimer_cles(self, n, cles):
+        h = self._hacher(cles).astype(np.intp)
+        return self._cms[n][np.arange(h.shape[0])[:, None], h].min(axis=0)
+
+    def _ajouter_approche(self, n, cles, comptes):
+        if not cles:
+            return
+        cms = self._cms[n]
+        h = self._hacher(cles).astype(np.intp)
+        for ligne in range(cms.shape[0]):
+            np.add.at(cms[ligne], h[ligne], comptes)
+
+        # Heavy hitters : anciens candidats ∪ clés du bloc, réévalués sur le
+        # sketch ; on ne garde que les k meilleurs
+        cand = self._candidats[n]
+        union = list(cand) + [c for c in cles if c not in cand]
+        estimes = self._estimer_cles(n, union)
+        if len(union) > self.k:
+            garder = np.argpartition(-estimes, self.k - 1)[:self.k]
+        else:
+            garder = range(len(union))
+        self._candidats[n] = {union[i]: int(estimes[i]) for i in garder}
+
+    # ------------------------------------------------------------
+    #  REQUÊTES
+    # ------------------------------------------------------------
+    def estimer(self, motif):
+        """Nombre d'occurrences (exact, ou majorant en mode approché) d'un motif."""
+        n = len(motif)
+        cle = 0
+        for v in motif:
+            cle = (cle << self.bits) | int(v)
+        if self.mode == "exact":
+            return self._comptes[n][cle]
+        return int(self._estimer_cles(n, [cle])[0])
+
+    def top(self, taille, k=10):
+        """[(motif, occurrences)] des k motifs de cette taille les plus fréquents."""
+        if self.mode == "exact":
+            return [(self.decoder(c, taille), nb) for c, nb in self._comptes[taille].most_common(k)]
+        estimes = sorted(self._candidats[taille].items(), key=lambda x: x[1], reverse=True)
+        return [(self.decoder(c, taille), nb) for c, nb in estimes[:k]]
+
+    def comptes(self, taille):
+        """Dictionnaire {motif: occurrences} complet (mode exact uniquement)."""
+        if self.mode != "exact":
+            raise ValueError("comptes() n'est disponible qu'en mode exact")
+        return {self.decoder(c, taille): nb for c, nb in self._comptes[taille].items()}
+
+
+def compter_motifs(deltas, longueur_max=3, **options):
+    """Raccourci : moteur alimenté en un seul bloc (bits ajusté au plus grand Δ par défaut)."""
+    if "bits" not in options and len(deltas):
+        maxi = np.max(deltas) if np is not None else max(deltas)
+        options["bits"] = max(BITS_DELTA, int(maxi).bit_length())
+    moteur = MoteurMotifs(longueur_max, **options)
+    moteur.ajouter(deltas)
+    return moteur
@@ -0,0 +1,111 @@
+import argparse
+import csv
+from itertools import islice
+
+from crible_sg import iter_sg
+from grammaire import GRAMMAIRE_DEFAUT
+from index_sg import IndexSG
+
+# =============================================================================
+# PIPELINE G3 EN FLUX : SG -> (Δ, familles, G1/G2/G3) -> CSV / .npz
+# =============================================================================
+#
+# Chaque étape est un itérateur : la mémoire reste constante quelle que soit
+# la borne N, seules les lignes d'un bloc sont tenues en mémoire avant
+# d'être écrites sur disque.
+
+COLONNES_G3 = ["n", "p", "fam_p", "q", "fam_q", "delta", "G1", "G2", "G3"]
+TAILLE_BLOC = 100_000
+
+# (G1, G2, G3) d'un Δ : classification de la grammaire (grammaire.py)
+classifier_delta = GRAMMAIRE_DEFAUT.classer
+
+
+def get_famille(p):
+    r = p % 30
+    if r == 29: return "348"
+    if r == 23: return "276"
+    if r == 11: return "132"
+    return "?"
+
+
+def source_sg(lo, hi):
+    """SG de [lo, hi] : depuis l'index s'il couvre l'intervalle, sinon par crible."""
+    index = IndexSG(calculer=False)
+    if index.couvre(lo, hi):
+        return index.iter_range(lo, hi)
+    return iter_sg(lo, hi)
+
+
+def iter_lignes_g3(sg_iter):
+    """Transforme une suite croissante de SG en lignes (n, p, fam_p, q, fam_q, Δ, G1, G2, G3)."""
+    it = iter(sg_iter)
+    p = next(it, None)
+    if p is None:
+        return
+    fam_p = get_famille(p)
+    for n, q in enumerate(it):
+        fam_q = get_famille(q)
+        delta = q - p
+        yield (n, p, fam_p, q, fam_q, delta) + classifier_delta(delta)
+        p, fam_p = q, fam_q
+
+
+def _suivre(lignes, synthese, taille_bloc, on_anomalie=None, progression=None):
+    """Laisse passer les lignes en tenant la synthèse G1/G2/G3 à jour."""
+    for ligne in lignes:
+        synthese["G1"] += ligne[6]
+        synthese["G2"] += ligne[7]
+        if ligne[8]:
+            synthese["G3"] += 1
+            if on_anomalie:
+                on_anomalie(ligne)
+        synthese["lignes"] += 1
+        if progression and synthese["lignes"] % taille_bloc == 0:
+            progression(synthese["lignes"], ligne[3])
+        yield ligne
+
+
+def ecrire_g3(chemin, lignes, taille_bloc=TAILLE_BLOC,
+              on_anomalie=None, progression=None):
+    """
+    Écrit les lignes G3 par blocs de taille_bloc, en CSV ou au format
+    colonnaire si chemin se termine par .npz (voir format_g3.py).
+    Retourne la synthèse {"lignes", "G1", "G2", "G3"}.
+    """
+    synthese = {"lignes": 0, "G1": 0, "G2": 0, "G3": 0}
+    it = _suivre(lignes, synthese, taille_bloc, on_anomalie, progression)
+
+    if chemin.endswith(".npz"):
+        from format_g3 import ecrire_g3_npz
+        ecrire_g3_npz(chemin, it)
+        return synthese
+
+    with open(chemin, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLONNES_G3)
+        while True:
+            bloc = list(islice(it, taille_bloc))
+            if not bloc:
+                break
+            writer.writerows(bloc)
+    return synthese
+
+
+def produire_g3(limit_n, chemin, lo=11, **kwargs):
+    """Génère la table G3 des SG de [lo, limit_n] directement dans chemin (.csv ou .npz)."""
+    return ecrire_g3(chemin, iter_lignes_g3(source_sg(lo, limit_n)), **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Production en flux d'une table G3 (.csv ou .npz).")
+    parser.add_argument("limite", type=int, help="borne supérieure N des SG")
+    parser.add_argument("sortie", help="fichier de sortie (.csv, ou .npz pour le format colonnaire)")
+    parser.add_argument("--debut", type=int, default=11, help="borne inférieure (défaut 11)")
+    args = parser.parse_args()
+
+    def afficher(lignes, dernier_q):
+        print(f"  {lignes} lignes écrites (q = {dernier_q})", flush=True)
+
+    s = produire_g3(args.limite, args.sortie, lo=args.debut, progression=afficher)
+    print(f"Terminé : {s['lignes']} lignes | G1={s['G1']} G2={s['G2']} G3={s['G3']}")
@@ -0,0 +1,340 @@
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import chain
+
+# =============================================================================
+# BACKENDS DE PRIMALITÉ
+# =============================================================================
+#
+#   "division"     : division d'essai jusqu'à √n (historique, exact)
+#   "miller_rabin" : roue de petits premiers + Miller–Rabin déterministe
+#                    (témoins 2..37, exact pour n < 3.18·10^23), BPSW au-delà
+#   "bpsw"         : roue + Baillie–PSW (Miller–Rabin base 2 + Lucas fort)
+#   "auto"         : Miller–Rabin à 7 témoins (Sinclair) sous 2^64, BPSW au-delà
+
+PETITS_PREMIERS = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47,
+                   53, 59, 61, 67, 71, 73, 79, 83, 89, 97)
+
+TEMOINS_PREMIERS = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+LIMITE_TEMOINS_PREMIERS = 318665857834031151167461
+
+TEMOINS_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+LIMITE_64 = 1 << 64
+
+
+def filtre_roue(n):
+    """
+    Préfiltre par la roue des petits premiers.
+    Retourne True / False si la réponse est décidée, None sinon.
+    """
+    if n < 2:
+        return False
+    for f in PETITS_PREMIERS:
+        if n % f == 0:
+            return n == f
+    if n < 101 * 101:
+        return True
+    return None
+
+
+def _mr_temoin(n, d, s, a):
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _miller_rabin(n, temoins):
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in temoins:
+        if a % n == 0:
+            continue
+        if not _mr_temoin(n, d, s, a):
+            return False
+    return True
+
+
+def _lucas_fort(n):
+    """Test de Lucas fort (paramètres de Selfridge, méthode A)."""
+    r = math.isqrt(n)
+    if r * r == n:
+        return False
+
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    P, Q = 1, (1 - D) // 4
+
+    d, s = n + 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    # Calcul de U_d, V_d, Q^d par la chaîne binaire
+    U, V, Qk = 1, P, Q % n
+    for bit in bin(d)[3:]:
+        U, V = U * V % n, (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == "1":
+            U, V = P * U + V, D * U + P * V
+            if U % 2:
+                U += n
+            if V % 2:
+                V += n
+            U, V = (U // 2) % n, (V // 2) % n
+            Qk = Qk * Q % n
+
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        if V == 0:
+            return True
+        Qk = Qk * Qk % n
+    return False
+
+
+def _jacobi(a, n):
+    a %= n
+    resultat = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                resultat = -resultat
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            resultat = -resultat
+        a %= n
+    return resultat if n == 1 else 0
+
+
+def est_premier_division(n):
+    if n < 2:
+        return False
+    if n % 2 == 0:
+        return n == 2
+    for f in range(3, math.isqrt(n) + 1, 2):
+        if n % f == 0:
+            return False
+    return True
+
+
+def est_premier_miller_rabin(n):
+    decide = filtre_roue(n)
+    if decide is not None:
+        return decide
+    if n >= LIMITE_TEMOINS_PREMIERS:
+        return _miller_rabin(n, (2,)) and _lucas_fort(n)
+    return _miller_rabin(n, TEMOINS_PREMIERS)
+
+
+def est_premier_bpsw(n):
+    decide = filtre_roue(n)
+    if decide is not None:
+        return decide
+    return _miller_rabin(n, (2,)) and _lucas_fort(n)
+
+
+def est_premier_auto(n):
+    decide = filtre_roue(n)
+    if decide is not None:
+        return decide
+    if n < LIMITE_64:
+        return _miller_rabin(n, TEMOINS_64)
+    return _miller_rabin(n, (2,)) and _lucas_fort(n)
+
+
+BACKENDS = {
+    "auto": est_premier_auto,
+    "miller_rabin": est_premier_miller_rabin,
+    "bpsw": est_premier_bpsw,
+    "division": est_premier_division,
+}
+
+BACKEND_DEFAUT = "auto"
+
+
+def get_backend(nom=None):
+    """Retourne la fonction de test associée au nom (défaut : "auto")."""
+    if nom is None:
+        nom = BACKEND_DEFAUT
+    try:
+        return BACKENDS[nom]
+    except KeyError:
+        raise ValueError(f"Backend de primalité inconnu : {nom!r} "
+                         f"(choix : {', '.join(BACKENDS)})") from None
+
+
+# =============================================================================
+# CACHE BORNÉ
+# =============================================================================
+#
+# Positifs (< 2^64) : EnsembleCompact, tableau trié array('Q') consulté par
+# bisection, 16 octets par entier (valeur + ordre d'insertion) au lieu de
+# ~120 pour une entrée OrderedDict ; les insertions passent par un petit
+# tampon fusionné par lots, l'éviction est FIFO au moment des fusions.
+# Composés (et rares positifs >= 2^64) : LRU OrderedDict {n: résultat}.
+
+
+class EnsembleCompact:
+    """Ensemble borné d'entiers de [0, 2^64[ : array('Q') trié + tampon, éviction FIFO par lots."""
+
+    TAMPON = 4096
+    OCTETS_PAR_ENTREE = 16
+
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self._tries = array("Q")
+        self._ordre = array("Q")  # ordre d'insertion, pour l'éviction
+        self._tampon = set()
+
+    def __contains__(self, n):
+        if n in self._tampon:
+            return True
+        i = bisect_left(self._tries, n)
+        return i < len(self._tries) and self._tries[i] == n
+
+    def __len__(self):
+        return len(self._ordre)
+
+    def ajouter(self, n):
+        """Ajoute n (supposé absent) ; retourne le nombre d'entiers évincés."""
+        self._tampon.add(n)
+        self._ordre.append(n)
+        if len(self._tampon) >= min(self.TAMPON, self.maximum) or len(self._ordre) > self.maximum + self.TAMPON:
+            return self.fusionner()
+        return 0
+
+    def fusionner(self):
+        """Verse le tampon dans le tableau trié et évince les plus anciens au-delà de maximum."""
+        exces = max(0, len(self._ordre) - self.maximum)
+        if exces:
+            retires = set(self._ordre[:exces])
+            del self._ordre[:exces]
+            self._tampon -= retires
+            self._tries = array("Q", (x for x in self._tries if x not in retires))
+        if self._tampon:
+            self._tries = array("Q", sorted(chain(self._tries, self._tampon)))
+            self._tampon.clear()
+        return exces
+
+    def clear(self):
+        self._tries = array("Q")
+        self._ordre = array("Q")
+        self._tampon.clear()
+
+
+class CachePrimalite:
+    """
+    Cache borné des résultats de primalité.
+
+    Les premiers, rares et coûteux à retrouver, sont gardés dans un
+    EnsembleCompact qui reçoit la plus grosse part du budget mémoire ; les
+    composés dans un LRU. Les entiers tranchés par la roue ne sont jamais
+    stockés. Le cache est partagé sans risque entre threads.
+    """
+
+    # Coût approximatif d'une entrée OrderedDict (clé int + nœud + slot)
+    OCTETS_PAR_ENTREE = 120
+
+    def __init__(self, memoire_max=64 * 1024 * 1024, part_positifs=0.75):
+        self._positifs = EnsembleCompact(1)
+        self._lru = OrderedDict()  # composés, et positifs >= 2^64
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.filtres = 0
+        self._verrou = threading.Lock()
+        self.configurer(memoire_max, part_positifs)
+
+    def configurer(self, memoire_max, part_positifs=0.75):
+        budget_positifs = int(memoire_max * part_positifs)
+        self.memoire_max = memoire_max
+        self.max_positifs = max(1, budget_positifs // EnsembleCompact.OCTETS_PAR_ENTREE)
+        self.max_composes = max(1, (memoire_max - budget_positifs) // self.OCTETS_PAR_ENTREE)
+        with self._verrou:
+            self._positifs.maximum = self.max_positifs
+            self.evictions += self._positifs.fusionner()
+            self._evincer()
+
+    def _evincer(self):
+        while len(self._lru) > self.max_composes:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    def _consulter(self, n):
+        """Résultat en cache (True / False), ou None ; sous verrou."""
+        if n < LIMITE_64 and n in self._positifs:
+            return True
+        if n in self._lru:
+            self._lru.move_to_end(n)
+            return self._lru[n]
+        return None
+
+    def test(self, n, fonction):
+        """Retourne fonction(n), en passant par la roue puis par le cache."""
+        decide = filtre_roue(n)
+        if decide is not None:
+            with self._verrou:
+                self.filtres += 1
+            return decide
+        with self._verrou:
+            connu = self._consulter(n)
+            if connu is not None:
+                self.hits += 1
+                return connu
+            self.misses += 1
+        resultat = fonction(n)
+        with self._verrou:
+            if resultat and n < LIMITE_64:
+                if n not in self._positifs:
+                    self.evictions += self._positifs.ajouter(n)
+            else:
+                self._lru[n] = resultat
+                self._evincer()
+        return resultat
+
+    def __contains__(self, n):
+        with self._verrou:
+            return (n < LIMITE_64 and n in self._positifs) or n in self._lru
+
+    def __len__(self):
+        return len(self._positifs) + len(self._lru)
+
+    def clear(self):
+        with self._verrou:
+            self._positifs.clear()
+            self._lru.clear()
+            self.hits = self.misses = self.evictions = self.filtres = 0
+
+    def stats(self):
+        with self._verrou:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "filtres_roue": self.filtres,
+                "taux_hit": self.hits / total if total else 0.0,
+                "positifs": len(self._positifs),
+                "composes": len(self._lru),
+                "memoire_estimee": (len(self._positifs) * EnsembleCompact.OCTETS_PAR_ENTREE
+                                    + len(self._lru) * self.OCTETS_PAR_ENTREE),
+                "memoire_max": self.memoire_max,
+            }
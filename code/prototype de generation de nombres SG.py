@@ -4,281 +4,38 @@ import random
 import math
 import csv
 import time
+import queue
+import threading
+import importlib.util
 
+from generateur_sg import (
+    crible_raisonnable, debut_corrige_348, generate_random_model, generate_safe_primes_grammar,
+    generate_sg_grammar_strict, prime_cache, recommend_sg_max,
+)
+from primalite import BACKENDS, BACKEND_DEFAUT
 
-try:
-    import matplotlib
-    matplotlib.use("TkAgg")
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    from matplotlib.figure import Figure
-except ImportError:
-    Figure = None
+# Dépendances lourdes chargées à la demande : matplotlib au premier
+# graphique, pandas au premier export Excel. L'API objet (Figure +
+# FigureCanvasTkAgg) n'a pas besoin de matplotlib.use("TkAgg").
 
+def _matplotlib():
+    """(FigureCanvasTkAgg, Figure, numpy), ou None si matplotlib est absent."""
+    try:
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        import numpy as np
+    except ImportError:
+        return None
+    return FigureCanvasTkAgg, Figure, np
 
 
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
+# Budget de chaque génération (secondes), passé aux générateurs et affiché
+TIMEOUT_GENERATION = 120
 
-# ============================
-#  FILTRE ANGULAIRE
-# ============================
-
-ANGLE_348_RESIDU = 29  # résidu modulo 30 pour l’angle 348°
-
-def is_angle_348(n):
-    return n % 30 == ANGLE_348_RESIDU
-
-def debut_corrige_348(start):
-    """Plus petit entier >= start dans l’angle 348°."""
-    n = start
-    while not is_angle_348(n):
-        n += 1
-    return n
-
-# ============================
-#  CACHE DE PRIMALITÉ
-# ============================
-
-prime_cache = {}
-
-def is_prime(n):
-    if n in prime_cache:
-        return prime_cache[n]
-    if n < 2:
-        prime_cache[n] = False
-        return False
-    if n % 2 == 0:
-        prime_cache[n] = (n == 2)
-        return prime_cache[n]
-    r = int(math.isqrt(n))
-    for f in range(3, r + 1, 2):
-        if n % f == 0:
-            prime_cache[n] = False
-            return False
-    prime_cache[n] = True
-    return True
-
-# ============================
-#  GRAMMAIRES G1 / G2 / G3
-# ============================
-
-G1 = [1, 2, 3, 4, 5, 7, 8, 9, 12, 13, 14, 15]
-
-G2_2uplets = [
-    (1,8), (8,5), (5,1),
-    (2,13), (13,2),
-    (7,4), (4,7),
-    (1,12), (12,1),
-    (9,3), (3,8),
-    (5,4), (4,9),
-    (8,13), (13,7),
-]
-
-G3_A = [3, 4, 6, 9, 11, 14, 15, 16, 18, 19, 20, 21, 22]
-G3_B = [24, 28, 29, 30, 31, 34, 36, 37, 42, 44]
-G3_C = [
-    [20,29,3], [19,30], [4,11], [15,30],
-    [21,21,23,11,3,3,4,4,24,3,22],
-    [15,9], [4,3,14], [9,44], [19,3,18],
-    [26,15,15,3,10,16], [42,6,22], [17,3],
-    [11,10], [22,9,4,14], [3,44,17],
-    [20,14], [24,18,20], [27,34], [18,19,30],
-    [32,10,9], [24,71,17,4], [15,19], [3,3],
-    [37,18,36,22], [34,21], [4,14], [4,21,4],
-    [15,4,31,11], [19,36,14,6,15],
-]
-
-# ============================
-#  GÉNÉRATEUR SG GRAMMATICAL
-# ============================
-
-def generate_sg_grammar_strict(start, end, count, rng,
-                               use_g1=True, use_g2=True, use_g3=True,
-                               progress_callback=None, time_callback=None,
-                               timeout_seconds=120):
-
-    if not (use_g1 or use_g2 or use_g3):
-        return [], []
-
-    # Trouver un premier SG dans l’angle 348°
-    p = None
-    for n in range(start, end + 1):
-        if is_angle_348(n) and is_prime(n) and is_prime(2*n + 1):
-            p = n
-            break
-    if p is None:
-        return [], []
-
-    sg = [p]
-    gaps = []
-    last_k = None
-    last_was_anomaly = False
-
-    start_time = time.time()
-    attempts = 0
-
-    while len(sg) < count:
-
-        if time.time() - start_time > timeout_seconds:
-            break
-
-        attempts += 1
-
-        if progress_callback:
-            progress_callback(len(sg), count)
-
-        if time_callback and attempts % 1000 == 0:
-            elapsed = time.time() - start_time
-            if len(sg) > 1:
-                rate = elapsed / (len(sg) - 1)
-                remaining = (count - len(sg)) * rate
-            else:
-                remaining = float("nan")
-            time_callback(elapsed, remaining)
-
-        r = rng.random()
-        k = None
-
-        # G3 anomalies
-        if use_g3 and not last_was_anomaly:
-            if r < 0.001:
-                seq = rng.choice(G3_C)
-                for k_seq in seq:
-                    candidate = p + 30*k_seq
-                    if candidate <= end and is_angle_348(candidate):
-                        if is_prime(candidate) and is_prime(2*candidate + 1):
-                            sg.append(candidate)
-                            gaps.append(k_seq)
-                            p = candidate
-                            last_k = k_seq
-                            last_was_anomaly = True
-                continue
-            elif r < 0.01:
-                k = rng.choice(G3_B)
-                last_was_anomaly = True
-            elif r < 0.03:
-                k = rng.choice(G3_A)
-                last_was_anomaly = True
-
-        # G1 squelette
-        if k is None:
-            k = rng.choice(G1) if use_g1 else rng.randint(1, 40)
-            last_was_anomaly = False
-
-        # G2 motifs internes
-        if use_g2 and last_k is not None:
-            if (last_k, k) not in G2_2uplets:
-                if rng.random() > 0.50:
-                    continue
-
-        candidate = p + 30*k
-        if candidate > end:
-            continue
-
-        if not is_angle_348(candidate):
-            continue
-
-        if is_prime(candidate) and is_prime(2*candidate + 1):
-            sg.append(candidate)
-            gaps.append(k)
-            p = candidate
-            last_k = k
-
-    return sg, gaps
-
-# ============================
-#  GÉNÉRATEUR SAFE PRIMES
-# ============================
-
-def generate_safe_primes_grammar(start, end, count_safe, rng,
-                                 use_g1=True, use_g2=True, use_g3=True,
-                                 progress_callback=None, time_callback=None,
-                                 timeout_seconds=120):
-
-    if count_safe <= 0:
-        return [], []
-
-    target_sg = max(count_safe * 5, count_safe + 10)
-
-    sg_list, gaps = generate_sg_grammar_strict(
-        start, end, target_sg, rng,
-        use_g1=use_g1, use_g2=use_g2, use_g3=use_g3,
-        progress_callback=progress_callback,
-        time_callback=time_callback,
-        timeout_seconds=timeout_seconds
-    )
-
-    safe_primes = []
-    sg_used = []
-
-    start_time = time.time()
-
-    for p in sg_list:
-
-        if time.time() - start_time > timeout_seconds:
-            break
-
-        if progress_callback:
-            progress_callback(len(safe_primes), count_safe)
 
-        if not is_angle_348(p):
-            continue
+def _pandas_disponible():
+    return importlib.util.find_spec("pandas") is not None
 
-        q = 2*p + 1
-
-        if not is_angle_348(q):
-            continue
-
-        if is_prime(q):
-            safe_primes.append(q)
-            sg_used.append(p)
-
-            if time_callback and len(safe_primes) > 0:
-                elapsed = time.time() - start_time
-                rate = elapsed / len(safe_primes)
-                remaining = (count_safe - len(safe_primes)) * rate
-                time_callback(elapsed, remaining)
-
-            if len(safe_primes) >= count_safe:
-                break
-
-    return safe_primes, sg_used
-
-# ============================
-#  MODÈLE HASARD
-# ============================
-
-def generate_random_model(start, end, count, rng=None):
-    if rng is None:
-        rng = random.Random()
-
-    sg_list = []
-    trials = 0
-
-    while len(sg_list) < count and trials < count * 200:
-        n = rng.randint(start, end)
-        if is_angle_348(n) and is_prime(n) and is_prime(2*n + 1):
-            if n not in sg_list:
-                sg_list.append(n)
-        trials += 1
-
-    sg_list.sort()
-    gaps = [(sg_list[i] - sg_list[i-1]) // 30 for i in range(1, len(sg_list))]
-    return sg_list, gaps
-
-# ============================
-#  RECOMMANDATION SG
-# ============================
-
-def recommend_sg_max(interval_size, use_g2, use_g3):
-    base = interval_size / 2000
-    if use_g2:
-        base *= 0.7
-    if use_g3:
-        base *= 0.5
-    return max(5, int(base))
 
 # ============================
 #  INTERFACE TKINTER
@@ -300,8 +57,17 @@ class SGApp(tk.Tk):
         self.safe_primes = []
         self.safe_sg = []
 
+        # Histogrammes des écarts calculés une fois par résultat (voir update_plots)
+        self.histos_gaps = None
+
         self.start_time = None
 
+        # Travaux en arrière-plan : nom -> (thread, stop_event, on_done, bouton) ;
+        # un seul travail par nom, chacun avec sa barre (self.barres[nom])
+        self.jobs = {}
+        self.job_queue = queue.Queue()
+        self.job_status = {}
+
         self._build_widgets()
 
     # ------------------------------------------------------------
@@ -312,9 +78,11 @@ class SGApp(tk.Tk):
     # ------------------------------------------------------------
     def update_plots(self):
         # Si matplotlib indisponible
-        if Figure is None:
+        mpl = _matplotlib()
+        if mpl is None:
             messagebox.showwarning("Graphiques", "matplotlib n'est pas installé. Graphiques indisponibles.")
             return
+        FigureCanvasTkAgg, Figure, np = mpl
 
         # Nettoyer l'onglet
         for child in self.frm_plots.winfo_children():
@@ -323,13 +91,17 @@ class SGApp(tk.Tk):
         fig = Figure(figsize=(6, 4), dpi=100)
         ax = fig.add_subplot(111)
 
-        gaps_g = self.gaps_grammar
-        gaps_r = self.gaps_random
+        # Classes calculées une seule fois par génération ; chaque rendu ne
+        # trace ensuite que 20 barres pondérées
+        if self.histos_gaps is None:
+            self.histos_gaps = [
+                (label, *np.histogram(gaps, bins=20)[::-1])
+                for label, gaps in (("Grammaire", self.gaps_grammar), ("Hasard", self.gaps_random))
+                if gaps
+            ]
 
-        if gaps_g:
-            ax.hist(gaps_g, bins=20, alpha=0.6, label="Grammaire")
-        if gaps_r:
-            ax.hist(gaps_r, bins=20, alpha=0.6, label="Hasard")
+        for label, bords, comptes in self.histos_gaps:
+            ax.hist(bords[:-1], bins=bords, weights=comptes, alpha=0.6, label=label)
 
         ax.set_title("Distribution des écarts k")
         ax.set_xlabel("k")
@@ -393,6 +165,14 @@ class SGApp(tk.Tk):
         else:
             self.analysis_text.insert(tk.END, "Tous les SG des safe primes appartiennent à la chaîne grammaticale.\n\n")
 
+        st = prime_cache.stats()
+        self.analysis_text.insert(tk.END, "Cache de primalité :\n")
+        self.analysis_text.insert(tk.END, f"  Hits / Misses : {st['hits']} / {st['misses']} ({st['taux_hit']:.1%})\n")
+        self.analysis_text.insert(tk.END, f"  Évictions     : {st['evictions']}\n")
+        self.analysis_text.insert(tk.END, f"  Filtrés roue  : {st['filtres_roue']}\n")
+        self.analysis_text.insert(tk.END, f"  Entrées       : {st['positifs']} premiers, {st['composes']} composés "
+                                          f"(~{st['memoire_estimee'] / 1e6:.1f} / {st['memoire_max'] / 1e6:.0f} Mo)\n\n")
+
         self.analysis_text.config(state="disabled")
 
 
@@ -421,9 +201,15 @@ class SGApp(tk.Tk):
 
         # (le reste de _build_widgets continue comme avant, mais en utilisant frm comme conteneur principal)
 
-        # Barre de progression
-        self.progress = ttk.Progressbar(frm, orient="horizontal", mode="determinate")
-        self.progress.pack(fill="x", pady=5)
+        # Barres de progression : une par génération (SG et safe primes
+        # peuvent tourner en même temps)
+        self.barres = {}
+        for nom in ("SG", "Safe"):
+            ligne = ttk.Frame(frm)
+            ligne.pack(fill="x", pady=2)
+            ttk.Label(ligne, text=nom, width=6).pack(side="left")
+            self.barres[nom] = ttk.Progressbar(ligne, orient="horizontal", mode="determinate")
+            self.barres[nom].pack(side="left", fill="x", expand=True)
 
         self.status = ttk.Label(frm, text="Prêt.")
         self.status.pack(fill="x")
@@ -481,6 +267,12 @@ class SGApp(tk.Tk):
         self.btn_turbo = ttk.Button(grammar_frame, text="Activer mode TURBO", command=self.toggle_turbo)
         self.btn_turbo.grid(row=1, column=0, columnspan=3, pady=5)
 
+        # Test de primalité
+        ttk.Label(grammar_frame, text="Test de primalité :").grid(row=2, column=0, sticky="w")
+        self.backend = tk.StringVar(value=BACKEND_DEFAUT)
+        ttk.Combobox(grammar_frame, textvariable=self.backend, values=list(BACKENDS),
+                     state="readonly", width=14).grid(row=2, column=1, sticky="w")
+
         # Boutons d’action
         btns = ttk.Frame(frm)
         btns.pack(fill="x", pady=5)
@@ -491,6 +283,9 @@ class SGApp(tk.Tk):
         self.btn_safe = ttk.Button(btns, text="Générer safe primes", command=self.on_run_safe)
         self.btn_safe.pack(side="left", padx=5)
 
+        self.btn_cancel = ttk.Button(btns, text="Annuler", command=self.on_cancel, state="disabled")
+        self.btn_cancel.pack(side="left", padx=5)
+
         self.btn_plots = ttk.Button(btns, text="Mettre à jour les graphiques", command=self.update_plots)
         self.btn_plots.pack(side="left", padx=5)
 
@@ -739,29 +534,40 @@ qui produisent un q premier dans l’angle 348°.
             return
 
         self.status.config(text="Génération SG…")
-        self.progress["value"] = 0
 
         rng = random.Random()
         self.start_time = time.time()
 
-        self.sg_grammar, self.gaps_grammar = generate_sg_grammar_strict(
-            start, end, count, rng,
-            use_g1=self.use_g1.get(),
-            use_g2=self.use_g2.get(),
-            use_g3=self.use_g3.get(),
-            progress_callback=self.update_progress,
-            time_callback=self.update_time_estimate
-        )
+        # Tirage non graine : le mode sans rejet (même loi) n'a rien à préserver ;
+        # crible : SG précalculés si c'est rapide (largeur et hauteur, voir crible_raisonnable)
+        params = dict(use_g1=self.use_g1.get(), use_g2=self.use_g2.get(),
+                      use_g3=self.use_g3.get(), backend=self.backend.get(),
+                      sans_rejet=True, crible=crible_raisonnable(start, end),
+                      timeout_seconds=TIMEOUT_GENERATION)
+
+        def travail(progress_callback, time_callback, stop_event):
+            sg, gaps = generate_sg_grammar_strict(
+                start, end, count, rng,
+                progress_callback=progress_callback,
+                time_callback=time_callback,
+                stop_event=stop_event,
+                **params
+            )
+            sg_r, gaps_r = generate_random_model(
+                start, end, len(sg), rng,
+                backend=params["backend"], stop_event=stop_event
+            )
+            return sg, gaps, sg_r, gaps_r
 
-        self.sg_random, self.gaps_random = generate_random_model(
-            start, end, len(self.sg_grammar), rng
-        )
+        def termine(resultat):
+            self.sg_grammar, self.gaps_grammar, self.sg_random, self.gaps_random = resultat
+            self.histos_gaps = None
+            self.safe_primes = []
+            self.safe_sg = []
+            self._display_results_sg()
+            self.update_analysis()
 
-        self.safe_primes = []
-        self.safe_sg = []
-
-        self._display_results_sg()
-        self.update_analysis()
+        self._start_job("SG", self.btn_run, travail, termine)
 
 
     # ------------------------------------------------------------
@@ -788,22 +594,110 @@ qui produisent un q premier dans l’angle 348°.
             return
 
         self.status.config(text="Génération safe primes…")
-        self.progress["value"] = 0
 
         rng = random.Random()
         self.start_time = time.time()
 
-        self.safe_primes, self.safe_sg = generate_safe_primes_grammar(
-            start, end, count_safe, rng,
-            use_g1=self.use_g1.get(),
-            use_g2=self.use_g2.get(),
-            use_g3=self.use_g3.get(),
-            progress_callback=self.update_progress,
-            time_callback=self.update_time_estimate
-        )
+        # Tirage non graine : le mode sans rejet (même loi) n'a rien à préserver ;
+        # crible : SG précalculés si c'est rapide (largeur et hauteur, voir crible_raisonnable)
+        params = dict(use_g1=self.use_g1.get(), use_g2=self.use_g2.get(),
+                      use_g3=self.use_g3.get(), backend=self.backend.get(),
+                      sans_rejet=True, crible=crible_raisonnable(start, end),
+                      timeout_seconds=TIMEOUT_GENERATION)
+
+        def travail(progress_callback, time_callback, stop_event):
+            return generate_safe_primes_grammar(
+                start, end, count_safe, rng,
+                progress_callback=progress_callback,
+                time_callback=time_callback,
+                stop_event=stop_event,
+                **params
+            )
+
+        def termine(resultat):
+            self.safe_primes, self.safe_sg = resultat
+            self._display_results_safe()
+            self.update_analysis()
+
+        self._start_job("Safe", self.btn_safe, travail, termine)
+
+    # ------------------------------------------------------------
+    #  TRAVAUX EN ARRIÈRE-PLAN
+    # ------------------------------------------------------------
+    def _start_job(self, nom, bouton, travail, on_done):
+        """
+        Lance travail(progress_callback, time_callback, stop_event) dans un
+        thread. Le thread ne touche jamais Tk : il poste ses messages dans
+        self.job_queue, relevée par _poll_jobs via after().
+        """
+        if nom in self.jobs:
+            return  # le bouton est désactivé : un seul travail de chaque sorte
+        self.barres[nom]["value"] = 0
+        stop_event = threading.Event()
+        dernier = [None]
+
+        def progress(current, total):
+            # Appelé à chaque tentative : on ne poste que les changements
+            if current != dernier[0]:
+                dernier[0] = current
+                self.job_queue.put((nom, "progress", (current, total)))
+
+        def temps(elapsed, remaining):
+            self.job_queue.put((nom, "time", (elapsed, remaining)))
+
+        def executer():
+            try:
+                resultat = travail(progress, temps, stop_event)
+            except Exception as e:
+                self.job_queue.put((nom, "error", e))
+            else:
+                self.job_queue.put((nom, "done", resultat))
+
+        thread = threading.Thread(target=executer, name=f"job-{nom}", daemon=True)
+        self.jobs[nom] = (thread, stop_event, on_done, bouton)
+        # Avancement (x/y) et temps (écoulé, reste) affichés côte à côte
+        self.job_status[nom] = {"avancement": "démarrage…", "temps": ""}
+        bouton.config(state="disabled")
+        self.btn_cancel.config(state="normal")
+        thread.start()
+
+        if len(self.jobs) == 1:
+            self.after(100, self._poll_jobs)
+
+    def _poll_jobs(self):
+        try:
+            while True:
+                nom, genre, valeur = self.job_queue.get_nowait()
+                if nom not in self.jobs:
+                    continue
+                if genre == "progress":
+                    self.update_progress(nom, *valeur)
+                    self.job_status[nom]["avancement"] = f"{valeur[0]}/{valeur[1]}"
+                elif genre == "time":
+                    self.update_time_estimate(nom, *valeur)
+                else:
+                    _, stop_event, on_done, bouton = self.jobs.pop(nom)
+                    self.job_status.pop(nom, None)
+                    bouton.config(state="normal")
+                    if genre == "error":
+                        messagebox.showerror("Erreur", f"Échec de la génération {nom} : {valeur}")
+                    else:
+                        on_done(valeur)
+                        if stop_event.is_set():
+                            self.status.config(text=f"Génération {nom} annulée (résultats partiels).")
+        except queue.Empty:
+            pass
+
+        if self.jobs:
+            self.status.config(text=" | ".join(
+                f"{n} : " + ", ".join(t for t in st.values() if t) for n, st in self.job_status.items()))
+            self.after(100, self._poll_jobs)
+        else:
+            self.btn_cancel.config(state="disabled")
 
-        self._display_results_safe()
-        self.update_analysis()
+    def on_cancel(self):
+        for _, stop_event, _, _ in self.jobs.values():
+            stop_event.set()
 
     # ------------------------------------------------------------
     #  AFFICHAGE SG
@@ -876,14 +770,14 @@ qui produisent un q premier dans l’angle 348°.
     # ------------------------------------------------------------
     #  PROGRESSION + TEMPS RESTANT
     # ------------------------------------------------------------
-    def update_progress(self, current, total):
+    def update_progress(self, nom, current, total):
         pct = int((current / total) * 100) if total > 0 else 0
-        self.progress["value"] = pct
-        self.update_idletasks()
+        self.barres[nom]["value"] = pct
 
-    def update_time_estimate(self, elapsed, remaining):
-        self.status.config(text=f"Génération… max 120 sec. écoulé : {elapsed:.1f} s")
-        self.update_idletasks()
+    def update_time_estimate(self, nom, elapsed, remaining):
+        eta = "?" if math.isnan(remaining) else f"{remaining:.0f} s"
+        if nom in self.job_status:
+            self.job_status[nom]["temps"] = f"écoulé {elapsed:.1f} s (max {TIMEOUT_GENERATION:g} s), reste ~{eta}"
 
 
     # ------------------------------------------------------------
@@ -929,7 +823,7 @@ qui produisent un q premier dans l’angle 348°.
             return
 
         filetypes = [("CSV", "*.csv")]
-        if pd is not None:
+        if _pandas_disponible():
             filetypes.append(("Excel", "*.xlsx"))
 
         filename = filedialog.asksaveasfilename(
@@ -964,7 +858,8 @@ qui produisent un q premier dans l’angle 348°.
                 "safe_prime_p": safe_p[i],
             })
 
-        if filename.endswith(".xlsx") and pd is not None:
+        if filename.endswith(".xlsx") and _pandas_disponible():
+            import pandas as pd
             df = pd.DataFrame(rows)
             df.to_excel(filename, index=False)
         else:
@@ -0,0 +1,58 @@
+from crible_sg import petits_premiers
+
+# =============================================================================
+# ROUE DE RÉSIDUS POUR LES CANDIDATS p + 30k
+# =============================================================================
+#
+# Pour chaque petit premier r (7 <= r <= borne), un candidat c est rejeté
+# d'office si c ≡ 0 (mod r) ou si 2c + 1 ≡ 0 (mod r), soit c ≡ (r-1)/2.
+# Les résidus interdits sont précalculés une fois ; tester un candidat ne
+# coûte ensuite qu'une consultation de table par premier, sans aucun test
+# de primalité.
+
+ROUE_BORNE_DEFAUT = 97
+
+
+class RoueResidus:
+    """Table des résidus interdits pour c et 2c + 1 modulo les petits premiers."""
+
+    def __init__(self, borne=ROUE_BORNE_DEFAUT):
+        self.borne = borne
+        self.premiers = [r for r in petits_premiers(borne) if r >= 7]
+        self.interdits = []
+        for r in self.premiers:
+            table = bytearray(r)
+            table[0] = 1
+            table[(r - 1) // 2] = 1
+            self.interdits.append(table)
+        self._p = None
+        self._p_mod = ()
+
+    def admissible(self, c):
+        """False si c ou 2c + 1 a un petit facteur premier (c > borne)."""
+        if c <= self.borne:
+            return True
+        for r, table in zip(self.premiers, self.interdits):
+            if table[c % r]:
+                return False
+        return True
+
+    def positionner(self, p):
+        """Mémorise p mod r pour tester ensuite les écarts k en O(1) chacun."""
+        if p != self._p:
+            self._p = p
+            self._p_mod = [p % r for r in self.premiers]
+
+    def k_admissible(self, p, k):
+        """Équivalent à admissible(p + 30k), sans réduire p à chaque appel."""
+        if p + 30*k <= self.borne:
+            return True
+        self.positionner(p)
+        for r, pm, table in zip(self.premiers, self._p_mod, self.interdits):
+            if table[(pm + 30*k) % r]:
+                return False
+        return True
+
+    def ks_admissibles(self, p, ks):
+        """Sous-liste des écarts k dont le candidat p + 30k passe la roue."""
+        return [k for k in ks if self.k_admissible(p, k)]
@@ -0,0 +1,126 @@
+import numpy as np
+
+# =============================================================================
+# NOYAUX STATISTIQUES VECTORISÉS (TABLES G3)
+# =============================================================================
+#
+# Transitions codées fam_p*3 + fam_q, comptages par np.unique : aucun objet
+# Python par ligne. par_apparition rend les comptes d'un bloc dans l'ordre
+# de première apparition : cumulés dans un Counter bloc après bloc, ils
+# donnent les mêmes classements most_common qu'un Counter ligne à ligne.
+# Les motifs de Δ sont comptés par motifs.MoteurMotifs.
+
+FAMILLES = (132, 276, 348)
+_INDEX_FAMILLE = np.full(512, -1, dtype=np.int8)
+for _i, _f in enumerate(FAMILLES):
+    _INDEX_FAMILLE[_f] = _i
+
+
+def codes_transitions(fam_p, fam_q):
+    """Code entier 0..8 de chaque transition : index(fam_p)*3 + index(fam_q)."""
+    i_p = _INDEX_FAMILLE[np.asarray(fam_p, dtype=np.int64)]
+    i_q = _INDEX_FAMILLE[np.asarray(fam_q, dtype=np.int64)]
+    return i_p.astype(np.int16) * 3 + i_q
+
+
+def decoder_transition(code):
+    return FAMILLES[code // 3], FAMILLES[code % 3]
+
+
+def par_apparition(x):
+    """[(valeur, compte)] dans l'ordre de première apparition (ordre d'un Counter)."""
+    x = np.asarray(x)
+    valeurs, premiers, comptes = np.unique(x, return_index=True, return_counts=True)
+    ordre = np.argsort(premiers)
+    return [(valeurs[i].item(), int(comptes[i])) for i in ordre]
+
+
+# =============================================================================
+# MOMENTS EN FLUX
+# =============================================================================
+#
+# Remplace les listes de Δ gardées uniquement pour np.mean / boxplot :
+# (n, moyenne, M2, min, max) mis à jour par blocs et fusionnables (formule
+# de Chan), plus l'histogramme exact des valeurs de Δ. Les Δ étant des
+# multiples de 6 bornés, cet histogramme n'a que quelques centaines
+# d'entrées et donne des quantiles exacts, là où un t-digest serait approché.
+# Les graphiques se tracent depuis ce résumé (histogramme par pas de 6,
+# boîtes par quantiles mis en cache) : un nouveau rendu coûte O(classes).
+
+class MomentsDelta:
+    """Moments et quantiles exacts d'une suite de Δ, en mémoire bornée."""
+
+    def __init__(self):
+        self.n = 0
+        self.moyenne = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.valeurs = {}
+        self._quantiles = {}
+
+    def ajouter(self, x):
+        """Ajoute un bloc de Δ (liste ou tableau)."""
+        x = np.asarray(x, dtype=np.int64)
+        if len(x) == 0:
+            return self
+        bloc = MomentsDelta()
+        bloc.n = len(x)
+        bloc.moyenne = float(x.mean())
+        bloc.m2 = float(((x - bloc.moyenne) ** 2).sum())
+        bloc.min, bloc.max = int(x.min()), int(x.max())
+        valeurs, comptes = np.unique(x, return_counts=True)
+        bloc.valeurs = dict(zip(valeurs.tolist(), comptes.tolist()))
+        return self.fusionner(bloc)
+
+    def fusionner(self, autre):
+        if autre.n == 0:
+            return self
+        n = self.n + autre.n
+        d = autre.moyenne - self.moyenne
+        self.moyenne += d * autre.n / n
+        self.m2 += autre.m2 + d * d * self.n * autre.n / n
+        self.min = autre.min if self.min is None else min(self.min, autre.min)
+        self.max = autre.max if self.max is None else max(self.max, autre.max)
+        for v, c in autre.valeurs.items():
+            self.valeurs[v] = self.valeurs.get(v, 0) + c
+        self.n = n
+        self._quantiles = {}
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / self.n if self.n else float("nan")
+
+    def quantile(self, q):
+        """Quantile exact, même interpolation linéaire que np.percentile."""
+        if self.n == 0:
+            return float("nan")
+        if q in self._quantiles:
+            return self._quantiles[q]
+        valeurs = sorted(self.valeurs)
+        cumul = np.cumsum([self.valeurs[v] for v in valeurs])
+        h = (self.n - 1) * q
+        bas = int(np.floor(h))
+        v_bas = valeurs[int(np.searchsorted(cumul, bas, side="right"))]
+        v_haut = valeurs[int(np.searchsorted(cumul, min(bas + 1, self.n - 1), side="right"))]
+        self._quantiles[q] = v_bas + (h - bas) * (v_haut - v_bas)
+        return self._quantiles[q]
+
+    def histogramme(self, pas=6):
+        """(bords, comptes) de Δ par classes de largeur pas, comme analyser_G3, sans relire les Δ."""
+        bords = np.arange(self.min, self.max + 12, pas)
+        comptes, _ = np.histogram(list(self.valeurs), bins=bords,
+                                  weights=list(self.valeurs.values()))
+        return bords, comptes.astype(np.int64)
+
+    def resume_boxplot(self, label=None, whis=1.5):
+        """Statistiques d'une boîte pour ax.bxp (règle 1.5·IQR de ax.boxplot)."""
+        q1, med, q3 = self.quantile(0.25), self.quantile(0.5), self.quantile(0.75)
+        iqr = q3 - q1
+        dedans = [v for v in self.valeurs if q1 - whis * iqr <= v <= q3 + whis * iqr]
+        return {
+            "label": label, "mean": self.moyenne, "med": med, "q1": q1, "q3": q3, "iqr": iqr,
+            "whislo": min(dedans + [q1]), "whishi": max(dedans + [q3]),
+            "fliers": np.array(sorted(v for v in self.valeurs if v < q1 - whis * iqr or v > q3 + whis * iqr)),
+        }